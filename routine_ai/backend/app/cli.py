@@ -0,0 +1,95 @@
+"""관리용 CLI.
+
+사용 예::
+
+  python -m app.cli rebuild-streaks
+  python -m app.cli recompute-pets   # PET_XP_* 레벨 곡선을 바꾼 뒤
+  python -m app.cli migrate          # 밀린 스키마 마이그레이션 적용
+  python -m app.cli migrate-status   # 현재/최신 스키마 버전과 대기 중인 마이그레이션
+  python -m app.cli serve --workers 4 --port 8000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+
+from .db import SessionLocal, init_db, schema_status
+from .services.pet_progression import recompute_pets
+from .services.progress_service import rebuild_streaks
+
+
+async def _migrate() -> None:
+  applied = await init_db()
+  for migration in applied:
+    print(f'적용: {migration.label}')
+  current, _, _ = await schema_status()
+  print(f'스키마 버전 {current} ({len(applied)}개 적용)')
+
+
+async def _migrate_status() -> None:
+  current, head, pending = await schema_status()
+  print(f'현재 버전: {current} / 최신: {head}')
+  for migration in pending:
+    extra = ' (백필)' if migration.backfill is not None else ''
+    print(f'대기: {migration.label}{extra}')
+
+
+async def _rebuild_streaks() -> None:
+  await init_db()
+  async with SessionLocal() as session:
+    conn = await session.connection()
+    users = await rebuild_streaks(conn)
+    await session.commit()
+  print(f'streak 재계산 완료: {users}명')
+
+
+async def _recompute_pets() -> None:
+  await init_db()
+  async with SessionLocal() as session:
+    conn = await session.connection()
+    pets = await recompute_pets(conn)
+    await session.commit()
+  print(f'펫 레벨 재계산 완료: {pets}마리')
+
+
+COMMANDS = {
+  'migrate': _migrate,
+  'migrate-status': _migrate_status,
+  'rebuild-streaks': _rebuild_streaks,
+  'recompute-pets': _recompute_pets,
+}
+
+
+def _serve(host: str, port: int, workers: int) -> None:
+  """마이그레이션을 부모 프로세스에서 한 번만 적용한 뒤 uvicorn 워커를 띄운다.
+
+  워커들이 동시에 마이그레이션하면 ALTER/백필이 경합하므로 워커는 버전 확인만 한다. 워커가
+  둘 이상이면 읽기 캐시 무효화 채널(``CacheBus``)을 켠다. 워커는 spawn으로 떠서 이 환경 변수를 읽는다.
+  """
+
+  import uvicorn
+
+  asyncio.run(_migrate())
+  os.environ['DB_AUTO_MIGRATE'] = 'false'
+  if workers > 1:
+    os.environ['CACHE_BUS_ENABLED'] = 'true'
+  uvicorn.run('app.main:app', host=host, port=port, workers=workers)
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(prog='python -m app.cli', description='Routine AI 백엔드 관리 명령')
+  parser.add_argument('command', choices=sorted([*COMMANDS, 'serve']))
+  parser.add_argument('--host', default='127.0.0.1', help='serve: 바인드 주소')
+  parser.add_argument('--port', type=int, default=8000, help='serve: 포트')
+  parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='serve: 워커 프로세스 수')
+  args = parser.parse_args(argv)
+  if args.command == 'serve':
+    _serve(args.host, args.port, args.workers)
+    return
+  asyncio.run(COMMANDS[args.command]())
+
+
+if __name__ == '__main__':
+  main()
@@ -2,7 +2,12 @@
 
 from __future__ import annotations
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from typing import Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 # SQLAlchemy 1.4에서는 ``async_sessionmaker`` 가 없을 수 있으므로 안전하게 폴백한다.
 try:  # pragma: no cover - 단순 임포트 가드
@@ -18,14 +23,85 @@ except ImportError:  # pragma: no cover - 구버전 SQLAlchemy 대응
     return sessionmaker(*args, **kwargs)
 
 from .config import settings
+from .instrumentation import install_query_timer
+from .migrations import (
+  MIGRATIONS,
+  Migration,
+  check_version,
+  current_version,
+  head_version,
+  migrate,
+  pending_migrations,
+)
 from .models.base import Base  # noqa: F401
+from .models import app_state as _app_state  # noqa: F401
+from .models import cache_event as _cache_event  # noqa: F401
+from .models import daily_rollup as _daily_rollup  # noqa: F401
+from .models import llm_cache as _llm_cache  # noqa: F401
 from .models import pet_state as _pet_state  # noqa: F401
 from .models import routine as _routine  # noqa: F401
 from .models import routine_log as _routine_log  # noqa: F401
+from .models import schema_version as _schema_version  # noqa: F401
 from .models import stats_cache as _stats_cache  # noqa: F401
 from .models import user as _user  # noqa: F401
 
-_engine = create_async_engine(settings.db_url, future=True, echo=False)
+
+def sqlite_pragmas() -> list[tuple[str, object]]:
+  """설정에서 연결 초기화용 PRAGMA 목록을 만든다."""
+
+  pragmas: list[tuple[str, object]] = [
+    ('journal_mode', settings.sqlite_journal_mode),
+    ('synchronous', settings.sqlite_synchronous),
+    ('busy_timeout', settings.sqlite_busy_timeout_ms),
+    ('mmap_size', settings.sqlite_mmap_size),
+    ('cache_size', settings.sqlite_cache_size),
+    ('temp_store', settings.sqlite_temp_store),
+  ]
+  return [(name, value) for name, value in pragmas if value != '']
+
+
+def install_sqlite_pragmas(engine: AsyncEngine, pragmas: Sequence[tuple[str, object]]) -> None:
+  """새 DBAPI 연결이 열릴 때마다 PRAGMA를 실행하는 훅을 등록한다. SQLite가 아니면 무시한다."""
+
+  if engine.dialect.name != 'sqlite' or not pragmas:
+    return
+
+  @event.listens_for(engine.sync_engine, 'connect')
+  def _on_connect(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+      for name, value in pragmas:
+        cursor.execute(f'PRAGMA {name}={value}')
+    finally:
+      cursor.close()
+
+
+def _engine_options() -> dict:
+  url = make_url(settings.db_url)
+  backend = url.get_backend_name()
+  connect_args = {}
+  # 드라이버 수준 prepared statement 캐시. 풀에서 재사용되는 연결마다 유지된다.
+  if backend == 'sqlite':
+    connect_args['cached_statements'] = settings.db_statement_cache_size
+  elif url.get_driver_name() == 'asyncpg':
+    connect_args['prepared_statement_cache_size'] = settings.db_statement_cache_size
+  options = {'connect_args': connect_args, 'pool_pre_ping': settings.db_pool_pre_ping}
+  if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+    return options
+  # 연결을 재사용해야 연결별 PRAGMA/mmap 설정이나 TCP/인증 비용을 요청마다 치르지 않는다.
+  return {
+    **options,
+    'poolclass': AsyncAdaptedQueuePool,
+    'pool_size': settings.db_pool_size,
+    'max_overflow': settings.db_max_overflow,
+    'pool_timeout': settings.db_pool_timeout_seconds,
+    'pool_recycle': settings.db_pool_recycle_seconds,
+  }
+
+
+_engine = create_async_engine(settings.db_url, future=True, echo=False, **_engine_options())
+install_sqlite_pragmas(_engine, sqlite_pragmas())
+install_query_timer(_engine)
 SessionLocal = async_sessionmaker(bind=_engine, expire_on_commit=False, class_=AsyncSession)
 
 
@@ -34,14 +110,21 @@ async def get_session() -> AsyncSession:
     yield session
 
 
-async def init_db() -> None:
-  async with _engine.begin() as conn:
-    await conn.run_sync(Base.metadata.create_all)
-    await _ensure_routine_icon_column(conn)
+async def init_db() -> list[Migration]:
+  """스키마를 최신 마이그레이션 버전으로 올리고 적용한 마이그레이션을 돌려준다. 이미 최신이면 버전 조회만 한다."""
+
+  return await migrate(_engine, MIGRATIONS)
+
+
+async def check_db() -> None:
+  """스키마가 이 코드의 마이그레이션 버전과 같은지만 확인한다. 다르면 ``SchemaOutOfDate``."""
+
+  await check_version(_engine, MIGRATIONS)
+
 
+async def schema_status() -> tuple[int, int, list[Migration]]:
+  """(현재 버전, 코드의 최신 버전, 아직 적용하지 않은 마이그레이션)."""
 
-async def _ensure_routine_icon_column(conn) -> None:
-  result = await conn.exec_driver_sql('PRAGMA table_info(routines)')
-  columns = {row[1] for row in result}
-  if 'icon_key' not in columns:
-    await conn.exec_driver_sql("ALTER TABLE routines ADD COLUMN icon_key TEXT DEFAULT 'yoga'")
+  async with _engine.connect() as conn:
+    current = await current_version(conn)
+  return current, head_version(MIGRATIONS), pending_migrations(MIGRATIONS, current)
@@ -1,11 +1,59 @@
 from fastapi import Depends
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from .config import settings
-from .db import get_session as _get_session
+from .db import SessionLocal, get_session as _get_session
+from .schemas.pet import PetState as PetStateSchema
+from .schemas.routine import RoutineRead
+from .services.cache_bus import CacheBus
+from .services.llm_cache import LLMResponseCache
 from .services.ollama_client import OllamaClient
+from .services.read_cache import ReadCache
 
-_ollama_client = OllamaClient(settings.ollama_url, settings.ollama_model)
+_ollama_client = OllamaClient(
+  settings.ollama_url,
+  settings.ollama_model,
+  settings.ollama_timeout_seconds,
+  max_connections=settings.ollama_max_connections,
+  max_keepalive_connections=settings.ollama_max_keepalive_connections,
+  keepalive_expiry=settings.ollama_keepalive_expiry_seconds,
+  max_in_flight=settings.ollama_max_in_flight,
+  max_queue=settings.ollama_max_queue,
+  queue_timeout_seconds=settings.ollama_queue_timeout_seconds,
+)
+
+_llm_cache = LLMResponseCache(
+  settings.llm_cache_max_entries,
+  settings.llm_cache_ttl_seconds,
+  persist=settings.llm_cache_persist,
+)
+
+_pet_state_cache = ReadCache(
+  'pet_state',
+  TypeAdapter(PetStateSchema),
+  settings.read_cache_max_entries,
+  settings.read_cache_ttl_seconds,
+)
+
+_routine_list_cache = ReadCache(
+  'routine_list',
+  TypeAdapter(list[RoutineRead]),
+  settings.read_cache_max_entries,
+  settings.read_cache_ttl_seconds,
+)
+
+# 워커가 하나면 무효화를 전할 곳이 없으므로 만들지 않는다.
+_cache_bus = (
+  CacheBus(
+    SessionLocal,
+    [_pet_state_cache, _routine_list_cache],
+    settings.cache_bus_poll_interval_seconds,
+    settings.cache_bus_retention_seconds,
+  )
+  if settings.cache_bus_enabled
+  else None
+)
 
 
 async def get_db() -> AsyncSession:
@@ -15,3 +63,19 @@ async def get_db() -> AsyncSession:
 
 def get_ollama_client() -> OllamaClient:
   return _ollama_client
+
+
+def get_llm_cache() -> LLMResponseCache:
+  return _llm_cache
+
+
+def get_pet_state_cache() -> ReadCache:
+  return _pet_state_cache
+
+
+def get_routine_list_cache() -> ReadCache:
+  return _routine_list_cache
+
+
+def get_cache_bus() -> CacheBus | None:
+  return _cache_bus
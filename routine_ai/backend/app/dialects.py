@@ -0,0 +1,51 @@
+"""DB 방언별로 다른 SQL을 한곳에 모은다.
+
+앱 코드는 SQLite와 PostgreSQL을 모두 지원한다. 둘 다 ``INSERT ... ON CONFLICT`` 를 같은 API
+(``on_conflict_do_update`` / ``on_conflict_do_nothing`` / ``excluded``)로 제공하므로, 방언에 맞는
+``insert`` 구문만 골라 주면 호출하는 쪽은 그대로 쓸 수 있다.
+"""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+_UPSERT_INSERTS = {
+  'sqlite': sqlite.insert,
+  'postgresql': postgresql.insert,
+}
+
+# PostgreSQL unique_violation SQLSTATE와 SQLite의 유니크/기본 키 위반 메시지.
+_PG_UNIQUE_VIOLATION = '23505'
+_SQLITE_UNIQUE_VIOLATION = re.compile(r'UNIQUE constraint failed: (\w+)\.')
+
+
+def dialect_of(executor: AsyncSession | AsyncConnection) -> Dialect:
+  if isinstance(executor, AsyncSession):
+    return executor.get_bind().dialect
+  return executor.dialect
+
+
+def upsert_insert(executor: AsyncSession | AsyncConnection, table):
+  """``on_conflict_do_update`` 를 쓸 수 있는 방언별 ``INSERT`` 구문을 만든다."""
+
+  name = dialect_of(executor).name
+  try:
+    return _UPSERT_INSERTS[name](table)
+  except KeyError:
+    raise NotImplementedError(f'upsert is not supported for the {name!r} dialect') from None
+
+
+def unique_violation_table(error: IntegrityError) -> str | None:
+  """``error`` 가 유니크(기본 키 포함) 제약 위반이면 그 테이블 이름을, FK/NOT NULL 등 다른 위반이면 None을 돌려준다."""
+
+  orig = error.orig
+  if getattr(orig, 'sqlstate', None) == _PG_UNIQUE_VIOLATION:
+    # asyncpg 어댑터는 드라이버 예외를 __cause__ 로 남기고, 거기에 테이블 이름이 있다.
+    return getattr(orig.__cause__, 'table_name', None)
+  match = _SQLITE_UNIQUE_VIOLATION.match(str(orig))
+  return match.group(1) if match else None
@@ -0,0 +1,99 @@
+"""요청/쿼리 계측.
+
+``MetricsMiddleware`` 는 라우트 템플릿(``/api/routine/{routine_id}`` 등) 단위로 요청 지연을 기록하고,
+``install_query_timer`` 는 SQLAlchemy 엔진에 커서 실행 시간을 재는 이벤트 훅을 건다. 값은
+``app.metrics`` 레지스트리에 쌓이고 ``/metrics`` 로 노출된다.
+"""
+
+from __future__ import annotations
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .metrics import counter, gauge, histogram
+
+HTTP_REQUEST_SECONDS = histogram(
+  'http_request_duration_seconds',
+  '라우트별 HTTP 요청 처리 시간 (응답 본문 전송 완료까지)',
+  ('method', 'route', 'status'),
+)
+HTTP_REQUESTS_IN_PROGRESS = gauge('http_requests_in_progress', '처리 중인 HTTP 요청 수', ('method',))
+DB_QUERY_SECONDS = histogram(
+  'db_query_duration_seconds',
+  'SQLAlchemy 커서 실행 시간',
+  ('operation',),
+  buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+DB_QUERY_ERRORS = counter('db_query_errors_total', '실패한 SQL 실행 수', ('operation',))
+
+UNMATCHED_ROUTE = '<unmatched>'
+_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'PRAGMA', 'CREATE', 'ALTER', 'WITH'})
+
+
+class MetricsMiddleware:
+  """HTTP 요청마다 (메서드, 라우트 템플릿, 상태 코드)별 지연을 기록하는 ASGI 미들웨어.
+
+  라우트 레이블은 라우팅이 끝난 뒤 scope에 남는 ``route.path`` 를 쓰므로 경로 파라미터 값이
+  레이블 카디널리티를 늘리지 않는다. 매칭되지 않은 요청은 ``<unmatched>`` 로 묶는다.
+  """
+
+  def __init__(self, app: ASGIApp) -> None:
+    self.app = app
+
+  async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+    if scope['type'] != 'http':
+      await self.app(scope, receive, send)
+      return
+
+    method = scope['method']
+    status_code = 500
+    began = time.perf_counter()
+
+    async def send_wrapper(message: Message) -> None:
+      nonlocal status_code
+      if message['type'] == 'http.response.start':
+        status_code = message['status']
+      await send(message)
+
+    HTTP_REQUESTS_IN_PROGRESS.inc(method=method)
+    try:
+      await self.app(scope, receive, send_wrapper)
+    finally:
+      HTTP_REQUESTS_IN_PROGRESS.dec(method=method)
+      route = scope.get('route')
+      HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - began,
+        method=method,
+        route=getattr(route, 'path', UNMATCHED_ROUTE),
+        status=str(status_code),
+      )
+
+
+def install_query_timer(engine: AsyncEngine) -> None:
+  """커서 실행 전후 이벤트로 쿼리 시간을 잰다. executemany도 한 번으로 센다."""
+
+  sync_engine = engine.sync_engine
+
+  @event.listens_for(sync_engine, 'before_cursor_execute')
+  def _before(conn, _cursor, _statement, _parameters, _context, _executemany) -> None:
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+  @event.listens_for(sync_engine, 'after_cursor_execute')
+  def _after(conn, _cursor, statement, _parameters, _context, _executemany) -> None:
+    started = conn.info['query_started'].pop()
+    DB_QUERY_SECONDS.observe(time.perf_counter() - started, operation=_operation(statement))
+
+  @event.listens_for(sync_engine, 'handle_error')
+  def _on_error(context) -> None:
+    stack = context.connection.info.get('query_started') if context.connection is not None else None
+    if stack:
+      stack.pop()
+    DB_QUERY_ERRORS.inc(operation=_operation(context.statement or ''))
+
+
+def _operation(statement: str) -> str:
+  keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+  return keyword.lower() if keyword in _OPERATIONS else 'other'
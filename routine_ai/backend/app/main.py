@@ -1,13 +1,17 @@
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .db import SessionLocal, init_db
-from .routes import admin, coach, pet, recommend, routine, stats
-from .services.pet_state_service import ensure_default_user
+from .config import settings
+from .db import SessionLocal, check_db, init_db
+from .deps import get_cache_bus, get_ollama_client
+from .instrumentation import MetricsMiddleware
+from .routes import admin, coach, metrics, pet, recommend, routine, stats
+from .services.rollup_service import run_rollup_aggregator
 
 
 def _cors_regex() -> str:
@@ -16,11 +20,29 @@ def _cors_regex() -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-  await init_db()
-  async with SessionLocal() as session:
-    await ensure_default_user(session, user_id=1)
-    await session.commit()
-  yield
+  if settings.db_auto_migrate:
+    await init_db()
+  else:
+    await check_db()
+  ollama = get_ollama_client()
+  await ollama.start()
+  tasks = [asyncio.create_task(run_rollup_aggregator(SessionLocal))]
+  cache_bus = get_cache_bus()
+  if cache_bus is not None:
+    tasks.append(asyncio.create_task(cache_bus.run()))
+  try:
+    yield
+  finally:
+    for task in tasks:
+      task.cancel()
+    for task in tasks:
+      with suppress(asyncio.CancelledError):
+        await task
+    if cache_bus is not None:
+      # 종료 직전에 커밋된 쓰기의 무효화도 다른 워커에 남긴다.
+      with suppress(Exception):
+        await cache_bus.flush()
+    await ollama.aclose()
 
 
 app = FastAPI(title='Routine AI Backend', version='0.1.0', lifespan=lifespan)
@@ -31,6 +53,8 @@ app.add_middleware(
   allow_methods=['*'],
   allow_headers=['*'],
 )
+# 마지막에 추가한 미들웨어가 가장 바깥에서 실행되므로 CORS 처리까지 포함해 잰다.
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(pet.router)
 app.include_router(coach.router)
@@ -38,3 +62,4 @@ app.include_router(recommend.router)
 app.include_router(stats.router)
 app.include_router(routine.router)
 app.include_router(admin.router)
+app.include_router(metrics.router)
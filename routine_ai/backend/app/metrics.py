@@ -0,0 +1,174 @@
+"""프로세스 내 경량 메트릭 레지스트리.
+
+Prometheus 명명 규칙을 따르는 Counter/Gauge/Histogram을 제공한다. 값은 레이블 값 튜플별로 누적된다.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterator
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+  0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+class _Metric:
+  kind = 'untyped'
+
+  def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = labelnames
+
+  def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+    if set(labels) != set(self.labelnames):
+      raise ValueError(f'{self.name} 레이블이 올바르지 않습니다: {sorted(labels)}')
+    return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+  kind = 'counter'
+
+  def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+    super().__init__(name, documentation, labelnames)
+    self._values: dict[tuple[str, ...], float] = {}
+
+  def inc(self, amount: float = 1.0, **labels: str) -> None:
+    key = self._key(labels)
+    self._values[key] = self._values.get(key, 0.0) + amount
+
+  def value(self, **labels: str) -> float:
+    return self._values.get(self._key(labels), 0.0)
+
+  def samples(self) -> Iterator[tuple[tuple[str, ...], float]]:
+    yield from self._values.items()
+
+
+class Gauge(_Metric):
+  kind = 'gauge'
+
+  def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> None:
+    super().__init__(name, documentation, labelnames)
+    self._values: dict[tuple[str, ...], float] = {}
+
+  def set(self, value: float, **labels: str) -> None:
+    self._values[self._key(labels)] = value
+
+  def inc(self, amount: float = 1.0, **labels: str) -> None:
+    key = self._key(labels)
+    self._values[key] = self._values.get(key, 0.0) + amount
+
+  def dec(self, amount: float = 1.0, **labels: str) -> None:
+    self.inc(-amount, **labels)
+
+  def value(self, **labels: str) -> float:
+    return self._values.get(self._key(labels), 0.0)
+
+  def samples(self) -> Iterator[tuple[tuple[str, ...], float]]:
+    yield from self._values.items()
+
+
+class Histogram(_Metric):
+  kind = 'histogram'
+
+  def __init__(
+    self,
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+  ) -> None:
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+    self._counts: dict[tuple[str, ...], list[int]] = {}
+    self._sums: dict[tuple[str, ...], float] = {}
+
+  def observe(self, value: float, **labels: str) -> None:
+    key = self._key(labels)
+    counts = self._counts.get(key)
+    if counts is None:
+      counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+      self._sums[key] = 0.0
+    counts[bisect_left(self.buckets, value)] += 1
+    self._sums[key] += value
+
+  def samples(self) -> Iterator[tuple[tuple[str, ...], list[int], float]]:
+    """레이블별 (버킷별 개수, 합계)를 돌려준다. 마지막 버킷은 +Inf 이다."""
+
+    for key, counts in self._counts.items():
+      yield key, list(counts), self._sums[key]
+
+
+REGISTRY: dict[str, _Metric] = {}
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+  return _register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+  return _register(Gauge(name, documentation, labelnames))
+
+
+def histogram(
+  name: str,
+  documentation: str,
+  labelnames: tuple[str, ...] = (),
+  buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+  return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def _register(metric):
+  existing = REGISTRY.get(metric.name)
+  if existing is not None:
+    return existing
+  REGISTRY[metric.name] = metric
+  return metric
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def render_text(registry: dict[str, _Metric] | None = None) -> str:
+  """레지스트리를 Prometheus 텍스트 노출 형식(0.0.4)으로 직렬화한다."""
+
+  lines: list[str] = []
+  for metric in (registry if registry is not None else REGISTRY).values():
+    lines.append(f'# HELP {metric.name} {_escape_help(metric.documentation)}')
+    lines.append(f'# TYPE {metric.name} {metric.kind}')
+    if isinstance(metric, Histogram):
+      for key, counts, total in metric.samples():
+        cumulative = 0
+        for bound, count in zip((*metric.buckets, float('inf')), counts):
+          cumulative += count
+          le = '+Inf' if bound == float('inf') else _format_value(bound)
+          lines.append(f'{metric.name}_bucket{_labels(metric.labelnames, key, le=le)} {cumulative}')
+        lines.append(f'{metric.name}_sum{_labels(metric.labelnames, key)} {_format_value(total)}')
+        lines.append(f'{metric.name}_count{_labels(metric.labelnames, key)} {cumulative}')
+    else:
+      for key, value in metric.samples():
+        lines.append(f'{metric.name}{_labels(metric.labelnames, key)} {_format_value(value)}')
+  return '\n'.join(lines) + '\n'
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], **extra: str) -> str:
+  pairs = [*zip(names, values), *extra.items()]
+  if not pairs:
+    return ''
+  return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def _escape_label(value: str) -> str:
+  return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _escape_help(value: str) -> str:
+  return value.replace('\\', '\\\\').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+  if value == int(value) and abs(value) < 1e15:
+    return str(int(value))
+  return repr(float(value))
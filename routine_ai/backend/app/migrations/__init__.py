@@ -0,0 +1,31 @@
+"""버전 관리되는 스키마 마이그레이션.
+
+적용한 버전은 ``schema_version`` 테이블에 한 줄씩 남고, ``MIGRATIONS`` 중 아직 적용하지 않은 것만 순서대로
+실행된다. 스키마 조작은 ``ops`` 의 방언 중립 함수(inspector 기반)로 한다.
+
+앱 시작 시에는 ``check_version`` 으로 버전만 확인하고, 적용은 ``python -m app.cli migrate`` 가 맡는다.
+"""
+
+from .runner import (
+  Backfill,
+  Migration,
+  SchemaOutOfDate,
+  check_version,
+  current_version,
+  head_version,
+  migrate,
+  pending_migrations,
+)
+from .versions import MIGRATIONS
+
+__all__ = [
+  'MIGRATIONS',
+  'Backfill',
+  'Migration',
+  'SchemaOutOfDate',
+  'check_version',
+  'current_version',
+  'head_version',
+  'migrate',
+  'pending_migrations',
+]
@@ -0,0 +1,69 @@
+"""마이그레이션에서 쓰는 방언 중립 스키마 조작.
+
+``PRAGMA table_info`` 같은 방언 전용 조회 대신 SQLAlchemy inspector를 쓰고, ``ALTER TABLE`` 의 컬럼 정의는
+연결된 방언으로 컴파일한다(예: ``DateTime`` → SQLite ``DATETIME``, PostgreSQL ``TIMESTAMP``).
+"""
+
+from __future__ import annotations
+
+from typing import Sequence
+
+from sqlalchemy import Column, Index, Integer, MetaData, Table, inspect
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+
+async def has_table(conn: AsyncConnection, table: str) -> bool:
+  return await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(table))
+
+
+async def column_names(conn: AsyncConnection, table: str) -> set[str]:
+  return await conn.run_sync(lambda sync_conn: {column['name'] for column in inspect(sync_conn).get_columns(table)})
+
+
+async def add_missing_columns(conn: AsyncConnection, table: str, columns: Sequence[Column]) -> list[str]:
+  """없는 컬럼만 ``ALTER TABLE ... ADD COLUMN`` 으로 더하고, 더한 컬럼 이름을 돌려준다.
+
+  기존 행이 있는 테이블에 NOT NULL 컬럼을 더하려면 ``server_default`` 가 있어야 한다.
+  """
+
+  existing = await column_names(conn, table)
+  added: list[str] = []
+  for column in columns:
+    if column.name in existing:
+      continue
+    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+    await conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {ddl}')
+    added.append(column.name)
+  return added
+
+
+def index(table: str, name: str, *columns: str, unique: bool = False) -> Index:
+  """테이블 이름과 컬럼 이름만으로 인덱스 정의를 만든다.
+
+  마이그레이션이 모델(현재 스키마)에 묶이지 않도록 적용 당시 정의를 그대로 적기 위한 것이다.
+  ``CREATE INDEX`` 에는 컬럼 타입이 쓰이지 않으므로 자리만 채운다.
+  """
+
+  stub = Table(table, MetaData(), *(Column(column, Integer) for column in columns))
+  return Index(name, *(stub.c[column] for column in columns), unique=unique)
+
+
+async def create_indexes(conn: AsyncConnection, indexes: Sequence[Index], *, concurrently: bool = False) -> None:
+  """``indexes`` 중 없는 것만 만든다.
+
+  ``concurrently`` 면 PostgreSQL에서 ``CREATE INDEX CONCURRENTLY`` 로 만들어 테이블 쓰기를 막지 않는다.
+  트랜잭션 안에서는 쓸 수 없으므로 ``Migration(transactional=False)`` 에서만 켠다. SQLite에서는 무시된다.
+  """
+
+  if concurrently and conn.dialect.name == 'postgresql':
+    for item in indexes:
+      ddl = str(CreateIndex(item, if_not_exists=True).compile(dialect=conn.dialect))
+      await conn.exec_driver_sql(ddl.replace('INDEX IF NOT EXISTS', 'INDEX CONCURRENTLY IF NOT EXISTS', 1))
+    return
+
+  def _create(sync_conn) -> None:
+    for item in indexes:
+      item.create(sync_conn, checkfirst=True)
+
+  await conn.run_sync(_create)
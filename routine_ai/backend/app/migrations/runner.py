@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Sequence
+
+from sqlalchemy import Row, Table, bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from ..models.app_state import AppState
+from ..models.schema_version import SchemaVersion
+from .ops import has_table
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_KEY_PREFIX = 'migration_backfill_'
+
+
+class SchemaOutOfDate(RuntimeError):
+  """DB 스키마 버전이 코드가 기대하는 버전과 다르다."""
+
+
+@dataclass(frozen=True)
+class Backfill:
+  """``table`` 을 id 순서로 ``batch_size`` 행씩 읽어 ``compute(row)`` 가 돌려준 값으로 갱신한다.
+
+  배치마다 트랜잭션을 따로 커밋하고 진행 위치를 ``app_state`` 에 남기므로, 큰 테이블에서도 잠금을 짧게
+  쥐고 중단되면 이어서 진행한다. ``columns`` 는 ``compute`` 에 넘길 행에 담을 컬럼이다.
+  """
+
+  table: Table
+  columns: tuple[str, ...]
+  compute: Callable[[Row], dict[str, Any]]
+  batch_size: int = 1000
+
+
+@dataclass(frozen=True)
+class Migration:
+  """버전 하나. ``upgrade`` 가 True를 돌려주면 ``backfill`` 을 이어서 실행한 뒤 버전을 기록한다.
+
+  ``transactional=False`` 면 ``upgrade`` 를 autocommit 연결에서 실행한다
+  (PostgreSQL ``CREATE INDEX CONCURRENTLY`` 처럼 트랜잭션 안에서 못 하는 작업용).
+  """
+
+  version: int
+  name: str
+  upgrade: Callable[[AsyncConnection], Awaitable[bool | None]]
+  backfill: Backfill | None = None
+  transactional: bool = True
+
+  @property
+  def label(self) -> str:
+    return f'{self.version:04d}_{self.name}'
+
+
+def head_version(migrations: Sequence[Migration]) -> int:
+  return migrations[-1].version if migrations else 0
+
+
+async def current_version(conn: AsyncConnection) -> int:
+  if not await has_table(conn, SchemaVersion.__tablename__):
+    return 0
+  return (await conn.execute(select(func.max(SchemaVersion.version)))).scalar() or 0
+
+
+def pending_migrations(migrations: Sequence[Migration], current: int) -> list[Migration]:
+  """``current`` 버전 이후에 적용할 마이그레이션."""
+
+  return [migration for migration in migrations if migration.version > current]
+
+
+async def check_version(engine: AsyncEngine, migrations: Sequence[Migration]) -> int:
+  """스키마 버전 한 번만 조회해 코드가 기대하는 버전과 같은지 확인한다. 다르면 ``SchemaOutOfDate``."""
+
+  async with engine.connect() as conn:
+    current = await current_version(conn)
+  head = head_version(migrations)
+  if current < head:
+    raise SchemaOutOfDate(
+      f'database schema is at version {current} but this build needs {head}; run `python -m app.cli migrate`'
+    )
+  if current > head:
+    raise SchemaOutOfDate(f'database schema version {current} is newer than this build ({head})')
+  return current
+
+
+async def migrate(
+  engine: AsyncEngine,
+  migrations: Sequence[Migration],
+  *,
+  pause_seconds: float = 0.01,
+) -> list[Migration]:
+  """아직 적용하지 않은 마이그레이션을 버전 순서대로 적용하고, 적용한 목록을 돌려준다.
+
+  스키마 변경은 마이그레이션마다 한 트랜잭션이고, 백필이 없으면 같은 트랜잭션에서 버전을 기록한다.
+  백필이 있으면 배치 사이에 ``pause_seconds`` 만큼 쉬어 앱 쓰기에 잠금을 양보하고, 끝난 뒤 기록한다.
+  이미 최신이면 버전 조회 한 번으로 끝난다.
+  """
+
+  versions = [migration.version for migration in migrations]
+  if versions != sorted(set(versions)):
+    raise ValueError(f'migration versions must be unique and increasing: {versions}')
+
+  async with engine.begin() as conn:
+    # 러너 자신이 쓰는 테이블(적용 이력, 백필 진행 위치)은 마이그레이션보다 먼저 있어야 한다.
+    await conn.run_sync(SchemaVersion.__table__.create, checkfirst=True)
+    await conn.run_sync(AppState.__table__.create, checkfirst=True)
+    current = await current_version(conn)
+
+  applied: list[Migration] = []
+  for migration in pending_migrations(migrations, current):
+    if not await _backfill_started(engine, migration):
+      needs_backfill = await _upgrade(engine, migration)
+      if not needs_backfill:
+        logger.info('applied migration %s', migration.label)
+        applied.append(migration)
+        continue
+    await _run_backfill(engine, migration, pause_seconds)
+    logger.info('applied migration %s (with backfill)', migration.label)
+    applied.append(migration)
+  return applied
+
+
+async def _upgrade(engine: AsyncEngine, migration: Migration) -> bool:
+  """스키마 변경을 적용한다. 백필이 필요하면 진행 위치를 만들고 True, 아니면 버전까지 기록하고 False."""
+
+  if migration.transactional:
+    async with engine.begin() as conn:
+      needs_backfill = bool(await migration.upgrade(conn)) and migration.backfill is not None
+      await _finish(conn, migration, needs_backfill)
+    return needs_backfill
+
+  async with engine.connect() as conn:
+    autocommit = await conn.execution_options(isolation_level='AUTOCOMMIT')
+    needs_backfill = bool(await migration.upgrade(autocommit)) and migration.backfill is not None
+  async with engine.begin() as conn:
+    await _finish(conn, migration, needs_backfill)
+  return needs_backfill
+
+
+async def _finish(conn: AsyncConnection, migration: Migration, needs_backfill: bool) -> None:
+  if needs_backfill:
+    await conn.execute(insert(AppState).values(key=_backfill_key(migration), value='0'))
+  else:
+    await conn.execute(insert(SchemaVersion).values(version=migration.version, name=migration.name))
+
+
+async def _backfill_started(engine: AsyncEngine, migration: Migration) -> bool:
+  if migration.backfill is None:
+    return False
+  async with engine.connect() as conn:
+    result = await conn.execute(select(AppState.value).where(AppState.key == _backfill_key(migration)))
+    return result.first() is not None
+
+
+async def _run_backfill(engine: AsyncEngine, migration: Migration, pause_seconds: float) -> None:
+  backfill = migration.backfill
+  table = backfill.table
+  key = _backfill_key(migration)
+  while True:
+    async with engine.begin() as conn:
+      cursor = int((await conn.execute(select(AppState.value).where(AppState.key == key))).scalar_one())
+      result = await conn.execute(
+        select(table.c.id, *(table.c[name] for name in backfill.columns))
+        .where(table.c.id > cursor)
+        .order_by(table.c.id)
+        .limit(backfill.batch_size)
+      )
+      rows = result.all()
+      if not rows:
+        await conn.execute(delete(AppState).where(AppState.key == key))
+        await conn.execute(insert(SchemaVersion).values(version=migration.version, name=migration.name))
+        return
+      values = [backfill.compute(row) for row in rows]
+      statement = (
+        update(table)
+        .where(table.c.id == bindparam('row_id'))
+        .values({name: bindparam(f'new_{name}') for name in values[0]})
+      )
+      await conn.execute(
+        statement,
+        [
+          {'row_id': row.id, **{f'new_{name}': value for name, value in row_values.items()}}
+          for row, row_values in zip(rows, values)
+        ],
+      )
+      await conn.execute(update(AppState).where(AppState.key == key).values(value=str(rows[-1].id)))
+    logger.info('migration %s backfill: %s rows up to id %s', migration.label, len(rows), rows[-1].id)
+    await asyncio.sleep(pause_seconds)
+
+
+def _backfill_key(migration: Migration) -> str:
+  return f'{BACKFILL_KEY_PREFIX}{migration.version}'
@@ -0,0 +1,322 @@
+"""스키마 마이그레이션 목록. 버전 순서대로 한 번씩만 적용된다.
+
+새 변경은 목록 끝에 다음 번호로 추가하고, 이미 배포된 마이그레이션은 고치지 않는다. 테이블/컬럼/인덱스 정의는
+모델이 나중에 바뀌어도 결과가 같도록 여기서 적용 당시 모습 그대로 적는다. 1번(baseline)은 버전 관리 이전의
+스키마(users, routines, routine_logs, stats_cache, pet_state)만 만들고, 이후 변경은 모두 2번부터 쌓는다.
+
+버전 테이블이 생기기 전 DB(예전 ``_ensure_*`` 보정만 받은 DB)도 같은 목록을 타므로, 테이블/컬럼/인덱스 추가는
+있는지 먼저 확인하고 백필은 컬럼을 새로 더했을 때만 한다. 큰 테이블 백필은 ``Backfill`` 로 선언해 배치 단위로
+커밋하고, 작은 테이블(pet_state 등)은 ``upgrade`` 안에서 바로 채운다. 데이터 변환은 서비스 함수를 그대로 쓴다.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy import (
+  Boolean,
+  Column,
+  Date,
+  DateTime,
+  Float,
+  ForeignKey,
+  Integer,
+  MetaData,
+  String,
+  Table,
+  Text,
+  column,
+  insert,
+  select,
+  table,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..services.pet_progression import backfill_total_xp, current_curve
+from ..services.progress_service import rebuild_streaks
+from ..services.rollup_service import init_rollup_backfill
+from ..services.routine_log_service import parse_log_time
+from ..services.schedule import days_to_mask, load_days, time_to_minutes
+from .ops import add_missing_columns, create_indexes, index
+from .runner import Backfill, Migration
+
+_schema = MetaData()
+
+_users = Table('users', _schema, Column('id', Integer, primary_key=True, autoincrement=False))
+
+_routines = Table(
+  'routines',
+  _schema,
+  Column('id', Integer, primary_key=True, autoincrement=True),
+  Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+  Column('title', String(200), nullable=False),
+  Column('time', String(20), nullable=False),
+  Column('days', String(200), nullable=False),
+  Column('difficulty', String(20), nullable=False),
+  Column('active', Boolean, nullable=False),
+  Column('icon_key', String(50), nullable=False),
+)
+
+_routine_logs = Table(
+  'routine_logs',
+  _schema,
+  Column('id', Integer, primary_key=True, autoincrement=True),
+  Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+  Column('routine_id', Integer, nullable=False),
+  Column('status', String(20), nullable=False),
+  Column('started_at', String(40), nullable=False),
+  Column('ended_at', String(40), nullable=False),
+  Column('note', Text),
+)
+
+_stats_cache = Table(
+  'stats_cache',
+  _schema,
+  Column('id', Integer, primary_key=True, autoincrement=True),
+  Column('user_id', Integer, ForeignKey('users.id'), nullable=False),
+  Column('week_start', String(20), nullable=False),
+  Column('completion_rate', Float, nullable=False),
+  Column('streak', Integer, nullable=False),
+  Column('insights_json', Text, nullable=False),
+  Column('tips_json', Text, nullable=False),
+)
+
+_pet_state = Table(
+  'pet_state',
+  _schema,
+  Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+  Column('level', Integer, nullable=False),
+  Column('xp', Integer, nullable=False),
+  Column('next_level_threshold', Integer, nullable=False),
+)
+
+_daily_rollups = Table(
+  'daily_rollups',
+  _schema,
+  Column('user_id', Integer, ForeignKey('users.id'), primary_key=True),
+  Column('day', Date, primary_key=True),
+  Column('slot', String(10), primary_key=True),
+  Column('done', Integer, nullable=False),
+  Column('partial', Integer, nullable=False),
+  Column('late', Integer, nullable=False),
+  Column('miss', Integer, nullable=False),
+  Column('other', Integer, nullable=False),
+)
+
+_llm_cache = Table(
+  'llm_cache',
+  _schema,
+  Column('key', String(64), primary_key=True),
+  Column('model', String(100), nullable=False),
+  Column('response_json', Text, nullable=False),
+  Column('created_at', DateTime, nullable=False),
+)
+
+_cache_events = Table(
+  'cache_events',
+  _schema,
+  Column('id', Integer, primary_key=True, autoincrement=True),
+  Column('cache', String(50), nullable=False),
+  Column('key', String(100)),
+  Column('origin', String(32), nullable=False),
+  Column('created_at', DateTime, nullable=False, index=True),
+)
+
+# 백필이 읽고 쓰는 컬럼만 담은 테이블. 더할 컬럼 정의도 여기서 가져다 쓴다.
+_routine_schedule = Table(
+  'routines',
+  MetaData(),
+  Column('id', Integer, primary_key=True),
+  Column('days', String(200), nullable=False),
+  Column('time', String(20), nullable=False),
+  Column('days_mask', Integer, nullable=False, server_default='0'),
+  Column('time_minutes', Integer),
+)
+
+_routine_log_timestamps = Table(
+  'routine_logs',
+  MetaData(),
+  Column('id', Integer, primary_key=True),
+  Column('started_at', String(40), nullable=False),
+  Column('ended_at', String(40), nullable=False),
+  Column('started_ts', DateTime),
+  Column('ended_ts', DateTime),
+)
+
+
+async def _create_tables(conn: AsyncConnection, *tables: Table) -> None:
+  await conn.run_sync(_schema.create_all, tables=list(tables), checkfirst=True)
+
+
+async def _baseline(conn: AsyncConnection) -> None:
+  await _create_tables(conn, _users, _routines, _routine_logs, _stats_cache, _pet_state)
+
+
+async def _routine_icon_key(conn: AsyncConnection) -> None:
+  await add_missing_columns(conn, 'routines', [Column('icon_key', String(50), server_default='yoga')])
+
+
+async def _routine_schedule_columns(conn: AsyncConnection) -> bool:
+  added = await add_missing_columns(
+    conn,
+    'routines',
+    [_routine_schedule.c.days_mask, _routine_schedule.c.time_minutes],
+  )
+  await create_indexes(
+    conn,
+    [
+      index('routines', 'ix_routines_schedule', 'time_minutes', 'days_mask'),
+      index('routines', 'ix_routines_due', 'active', 'time_minutes', 'days_mask'),
+    ],
+  )
+  return bool(added)
+
+
+def _schedule_values(row) -> dict:
+  """기존 JSON/쉼표 문자열 days와 HH:MM time을 비트마스크/분 컬럼으로 옮긴다."""
+
+  return {'days_mask': days_to_mask(load_days(row.days)), 'time_minutes': time_to_minutes(row.time)}
+
+
+async def _add_routine_log_timestamps(conn: AsyncConnection) -> bool:
+  added = await add_missing_columns(
+    conn,
+    'routine_logs',
+    [_routine_log_timestamps.c.started_ts, _routine_log_timestamps.c.ended_ts],
+  )
+  return bool(added)
+
+
+def _log_timestamp_values(row) -> dict:
+  """기존 문자열 로그 시각을 타임스탬프로 옮긴다. 파싱 불가 값은 NULL로 남긴다."""
+
+  return {'started_ts': parse_log_time(row.started_at), 'ended_ts': parse_log_time(row.ended_at)}
+
+
+async def _routine_log_indexes(conn: AsyncConnection) -> None:
+  # 큰 routine_logs에서도 PostgreSQL은 쓰기를 막지 않고 인덱스를 만든다 (트랜잭션 밖에서 실행).
+  await create_indexes(
+    conn,
+    [
+      index('routine_logs', 'ix_routine_logs_user_started', 'user_id', 'started_ts'),
+      index('routine_logs', 'ix_routine_logs_user_ended', 'user_id', 'ended_ts'),
+      index('routine_logs', 'ix_routine_logs_user_id', 'user_id', 'id'),
+      index('routine_logs', 'ix_routine_logs_routine_id', 'routine_id', 'id'),
+      index('routine_logs', 'ix_routine_logs_status_id', 'status', 'id'),
+    ],
+    concurrently=True,
+  )
+
+
+async def _routine_log_idempotency_key(conn: AsyncConnection) -> None:
+  await add_missing_columns(conn, 'routine_logs', [Column('idempotency_key', String(64))])
+  await create_indexes(
+    conn,
+    [index('routine_logs', 'ux_routine_logs_user_idempotency', 'user_id', 'idempotency_key', unique=True)],
+  )
+
+
+async def _pet_version(conn: AsyncConnection) -> None:
+  await add_missing_columns(conn, 'pet_state', [Column('version', Integer, nullable=False, server_default='0')])
+
+
+async def _pet_total_xp(conn: AsyncConnection) -> None:
+  added = await add_missing_columns(
+    conn,
+    'pet_state',
+    [Column('total_xp', Integer, nullable=False, server_default='0')],
+  )
+  if added:
+    await backfill_total_xp(conn)
+
+
+async def _pet_streak(conn: AsyncConnection) -> None:
+  added = await add_missing_columns(
+    conn,
+    'pet_state',
+    [
+      Column('streak', Integer, nullable=False, server_default='0'),
+      Column('streak_broken_at', DateTime),
+    ],
+  )
+  if 'streak' in added:
+    await rebuild_streaks(conn)
+
+
+async def _stats_cache_unique(conn: AsyncConnection) -> None:
+  # 유니크 인덱스 이전에 쌓인 중복 (user_id, week_start) 행은 가장 최근 것만 남긴다.
+  await conn.exec_driver_sql(
+    'DELETE FROM stats_cache WHERE id NOT IN '
+    '(SELECT MAX(id) FROM stats_cache GROUP BY user_id, week_start)'
+  )
+  await create_indexes(conn, [index('stats_cache', 'ux_stats_cache_user_week', 'user_id', 'week_start', unique=True)])
+
+
+async def _rollup_backfill_watermark(conn: AsyncConnection) -> None:
+  await _create_tables(conn, _daily_rollups)
+  await init_rollup_backfill(conn)
+
+
+async def _default_user(conn: AsyncConnection) -> None:
+  """앱이 기본으로 쓰는 ``user_id=1`` 과 그 펫을 만든다."""
+
+  if (await conn.execute(select(_users.c.id).where(_users.c.id == 1))).first() is None:
+    await conn.execute(insert(_users).values(id=1))
+  pet_state = table(
+    'pet_state',
+    column('user_id'),
+    column('total_xp'),
+    column('level'),
+    column('xp'),
+    column('next_level_threshold'),
+  )
+  if (await conn.execute(select(pet_state.c.user_id).where(pet_state.c.user_id == 1))).first() is None:
+    progress = current_curve().progress(0)
+    await conn.execute(
+      insert(pet_state).values(
+        user_id=1,
+        total_xp=0,
+        level=progress.level,
+        xp=progress.xp,
+        next_level_threshold=progress.next_level_threshold,
+      )
+    )
+
+
+async def _llm_cache_table(conn: AsyncConnection) -> None:
+  await _create_tables(conn, _llm_cache)
+
+
+async def _cache_events_table(conn: AsyncConnection) -> None:
+  await _create_tables(conn, _cache_events)
+
+
+async def _user_stats_version(conn: AsyncConnection) -> None:
+  await add_missing_columns(conn, 'users', [Column('stats_version', Integer, nullable=False, server_default='0')])
+
+
+MIGRATIONS: list[Migration] = [
+  Migration(1, 'baseline', _baseline),
+  Migration(2, 'routine_icon_key', _routine_icon_key),
+  Migration(
+    3,
+    'routine_schedule_columns',
+    _routine_schedule_columns,
+    backfill=Backfill(_routine_schedule, ('days', 'time'), _schedule_values),
+  ),
+  Migration(
+    4,
+    'routine_log_timestamps',
+    _add_routine_log_timestamps,
+    backfill=Backfill(_routine_log_timestamps, ('started_at', 'ended_at'), _log_timestamp_values),
+  ),
+  Migration(5, 'routine_log_indexes', _routine_log_indexes, transactional=False),
+  Migration(6, 'routine_log_idempotency_key', _routine_log_idempotency_key),
+  Migration(7, 'pet_version', _pet_version),
+  Migration(8, 'pet_total_xp', _pet_total_xp),
+  Migration(9, 'pet_streak', _pet_streak),
+  Migration(10, 'stats_cache_unique', _stats_cache_unique),
+  Migration(11, 'rollup_backfill_watermark', _rollup_backfill_watermark),
+  Migration(12, 'default_user', _default_user),
+  Migration(13, 'llm_cache', _llm_cache_table),
+  Migration(14, 'cache_events', _cache_events_table),
+  Migration(15, 'user_stats_version', _user_stats_version),
+]
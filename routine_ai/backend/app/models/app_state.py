@@ -0,0 +1,13 @@
+from sqlalchemy import String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AppState(Base):
+  """백그라운드 작업 진행 상황 등을 담는 키-값 저장소."""
+
+  __tablename__ = 'app_state'
+
+  key: Mapped[str] = mapped_column(String(100), primary_key=True)
+  value: Mapped[str] = mapped_column(Text, nullable=False)
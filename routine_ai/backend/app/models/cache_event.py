@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class CacheEvent(Base):
+  """워커 간 읽기 캐시 무효화 이벤트. ``key`` 가 NULL이면 해당 캐시 전체를 비운다."""
+
+  __tablename__ = 'cache_events'
+
+  id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+  cache: Mapped[str] = mapped_column(String(50), nullable=False)
+  key: Mapped[str | None] = mapped_column(String(100), nullable=True)
+  origin: Mapped[str] = mapped_column(String(32), nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,21 @@
+from datetime import date
+
+from sqlalchemy import Date, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class DailyRollup(Base):
+  """사용자/날짜/시간대별 로그 상태 집계. 로그 기록 시 증분으로 갱신된다."""
+
+  __tablename__ = 'daily_rollups'
+
+  user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), primary_key=True)
+  day: Mapped[date] = mapped_column(Date, primary_key=True)
+  slot: Mapped[str] = mapped_column(String(10), primary_key=True)
+  done: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+  partial: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+  late: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+  miss: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+  other: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
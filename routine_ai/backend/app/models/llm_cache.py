@@ -0,0 +1,17 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class LLMCacheEntry(Base):
+  """검증을 통과한 LLM 응답의 영속 캐시."""
+
+  __tablename__ = 'llm_cache'
+
+  key: Mapped[str] = mapped_column(String(64), primary_key=True)
+  model: Mapped[str] = mapped_column(String(100), nullable=False)
+  response_json: Mapped[str] = mapped_column(Text, nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
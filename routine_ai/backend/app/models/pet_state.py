@@ -1,8 +1,13 @@
-from sqlalchemy import ForeignKey, Integer
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Integer
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
 
+# total_xp 컬럼(INTEGER, PostgreSQL int4)에 담을 수 있는 최대 누적 XP.
+MAX_TOTAL_XP = 2**31 - 1
+
 
 class PetState(Base):
   """사용자의 펫 상태."""
@@ -13,3 +18,12 @@ class PetState(Base):
   level: Mapped[int] = mapped_column(Integer, default=1)
   xp: Mapped[int] = mapped_column(Integer, default=0)
   next_level_threshold: Mapped[int] = mapped_column(Integer, default=100)
+  # 누적 XP. level/xp/next_level_threshold 는 services.pet_progression 곡선으로 이 값에서 계산한다.
+  total_xp: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+  # 가장 최근 미완료(done 이외) 로그 이후 연속 done 수. complete 시 증분 갱신된다.
+  streak: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+  streak_broken_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+  # 낙관적 동시성 제어용 버전. ORM UPDATE는 ``WHERE version = ?`` 로 나가며 충돌 시 StaleDataError.
+  version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
+
+  __mapper_args__ = {'version_id_col': version}
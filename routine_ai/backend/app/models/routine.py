@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, ForeignKey, Integer, String
+from sqlalchemy import Boolean, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -8,6 +8,11 @@ class Routine(Base):
   """등록된 루틴."""
 
   __tablename__ = 'routines'
+  __table_args__ = (
+    Index('ix_routines_schedule', 'time_minutes', 'days_mask'),
+    # 알림 팬아웃용 "곧 실행될 루틴" 조회. days_mask까지 포함해 인덱스만으로 요일을 거른다.
+    Index('ix_routines_due', 'active', 'time_minutes', 'days_mask'),
+  )
 
   id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
   user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False, default=1)
@@ -17,3 +22,6 @@ class Routine(Base):
   difficulty: Mapped[str] = mapped_column(String(20), default='mid')
   active: Mapped[bool] = mapped_column(Boolean, default=True)
   icon_key: Mapped[str] = mapped_column(String(50), default='yoga')
+  # 요일 비트마스크(월=bit0 … 일=bit6)와 자정 이후 분. days/time 문자열과 함께 쓰기 시점에 채워진다.
+  days_mask: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+  time_minutes: Mapped[int | None] = mapped_column(Integer, nullable=True)
@@ -1,4 +1,6 @@
-from sqlalchemy import ForeignKey, Integer, String, Text
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -8,6 +10,16 @@ class RoutineLog(Base):
   """루틴 실행 결과 로그."""
 
   __tablename__ = 'routine_logs'
+  __table_args__ = (
+    Index('ix_routine_logs_user_started', 'user_id', 'started_ts'),
+    Index('ix_routine_logs_user_ended', 'user_id', 'ended_ts'),
+    # 관리자 로그 조회의 id 역순 keyset 페이지네이션용.
+    Index('ix_routine_logs_user_id', 'user_id', 'id'),
+    Index('ix_routine_logs_routine_id', 'routine_id', 'id'),
+    Index('ix_routine_logs_status_id', 'status', 'id'),
+    # 클라이언트 재시도가 같은 완료 기록을 두 번 넣지 못하게 한다. NULL 키끼리는 충돌하지 않는다.
+    Index('ux_routine_logs_user_idempotency', 'user_id', 'idempotency_key', unique=True),
+  )
 
   id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
   user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
@@ -16,3 +28,7 @@ class RoutineLog(Base):
   started_at: Mapped[str] = mapped_column(String(40), nullable=False)
   ended_at: Mapped[str] = mapped_column(String(40), nullable=False)
   note: Mapped[str | None] = mapped_column(Text, nullable=True)
+  # 원본 문자열을 파싱한 벽시계 기준 시각. 범위 조회/정렬은 이 컬럼으로 한다.
+  started_ts: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+  ended_ts: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+  idempotency_key: Mapped[str | None] = mapped_column(String(64), nullable=True)
@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class SchemaVersion(Base):
+  """적용된 스키마 마이그레이션 이력. 가장 큰 ``version`` 이 현재 스키마 버전이다."""
+
+  __tablename__ = 'schema_version'
+
+  version: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+  name: Mapped[str] = mapped_column(String(100), nullable=False)
+  applied_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Float, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -8,6 +8,7 @@ class StatsCache(Base):
   """주간 통계 캐시."""
 
   __tablename__ = 'stats_cache'
+  __table_args__ = (Index('ux_stats_cache_user_week', 'user_id', 'week_start', unique=True),)
 
   id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
   user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=False)
@@ -10,3 +10,5 @@ class User(Base):
   __tablename__ = 'users'
 
   id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+  # 주간 통계 캐시 세대. ``invalidate_weekly_stats`` 가 올리고, 통계 빌드는 읽을 때와 같을 때만 캐시에 쓴다.
+  stats_version: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default='0')
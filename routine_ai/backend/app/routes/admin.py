@@ -1,54 +1,101 @@
 from __future__ import annotations
 
-import json
+import csv
+import io
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import AsyncIterator
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..deps import get_db
+from ..db import SessionLocal
+from ..deps import get_db, get_pet_state_cache, get_routine_list_cache
+from ..models.pet_state import MAX_TOTAL_XP
 from ..models.routine import Routine
 from ..models.routine_log import RoutineLog
 from ..schemas.pet import PetState as PetStateSchema, PetStatePatch
 from ..schemas.routine import (
+  DueRoutine,
   RoutineCreate,
   RoutineLogRead,
   RoutineRead,
   RoutineUpdate,
 )
-from ..services.pet_state_service import get_or_create_pet_state
+from ..services.pet_progression import apply_total_xp, current_curve
+from ..services.pet_state_service import ensure_users, get_or_create_pet_state
+from ..services.read_cache import ReadCache
+from ..services.schedule import (
+  MINUTES_PER_DAY,
+  due_ranges,
+  due_routines_query,
+  parse_window,
+  routine_to_schema,
+  set_days,
+  set_time,
+)
 
 router = APIRouter(prefix='/admin', tags=['admin'])
 
+EXPORT_PAGE_SIZE = 1000
+
 
 @router.get('/routines', response_model=list[RoutineRead])
 async def list_routines(
+  request: Request,
   user_id: int = Query(default=1, ge=1),
   session: AsyncSession = Depends(get_db),
-) -> list[RoutineRead]:
-  result = await session.execute(select(Routine).where(Routine.user_id == user_id).order_by(Routine.id))
-  records = result.scalars().all()
-  return [_routine_to_schema(record) for record in records]
+  cache: ReadCache = Depends(get_routine_list_cache),
+) -> Response:
+  entry = cache.get(user_id)
+  if entry is None:
+    epoch = cache.epoch()
+    result = await session.execute(select(Routine).where(Routine.user_id == user_id).order_by(Routine.id))
+    records = result.scalars().all()
+    entry = cache.put(user_id, [routine_to_schema(record) for record in records], epoch)
+  return cache.respond(request, entry)
+
+
+@router.get('/routines/due')
+async def list_due_routines(
+  window: str = Query(default='15m', description='조회 기간 (예: 15m, 2h). 최대 24h'),
+  at: datetime | None = Query(default=None, description='기준 시각 (기본: 서버 현재 시각)'),
+) -> StreamingResponse:
+  """모든 사용자의 활성 루틴 중 기준 시각부터 ``window`` 안에 실행될 루틴을 NDJSON으로 흘려보낸다."""
+
+  window_minutes = parse_window(window)
+  if window_minutes is None or not 1 <= window_minutes <= MINUTES_PER_DAY:
+    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail='window must be 1m..24h')
+  reference = (at or datetime.now()).replace(tzinfo=None, second=0, microsecond=0)
+  return StreamingResponse(_stream_due_routines(reference, window_minutes), media_type='application/x-ndjson')
 
 
 @router.post('/routines', response_model=RoutineRead, status_code=status.HTTP_201_CREATED)
 async def create_routine(
   payload: RoutineCreate,
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> RoutineRead:
   record = Routine(
     user_id=payload.user_id,
     title=payload.title,
-    time=payload.time,
-    days=_dump_days(payload.days),
     difficulty=payload.difficulty,
     active=payload.active,
     icon_key=payload.icon_key,
   )
+  set_time(record, payload.time)
+  try:
+    set_days(record, payload.days)
+  except ValueError as exc:
+    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
+  await ensure_users(session, [record.user_id])
   session.add(record)
   await session.commit()
+  cache.invalidate(record.user_id)
   await session.refresh(record)
-  return _routine_to_schema(record)
+  return routine_to_schema(record)
 
 
 @router.put('/routines/{routine_id}', response_model=RoutineRead)
@@ -56,6 +103,7 @@ async def update_routine(
   payload: RoutineUpdate,
   routine_id: int = Path(..., ge=1),
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> RoutineRead:
   record = await session.get(Routine, routine_id)
   if record is None:
@@ -64,9 +112,12 @@ async def update_routine(
   if payload.title is not None:
     record.title = payload.title
   if payload.time is not None:
-    record.time = payload.time
+    set_time(record, payload.time)
   if payload.days is not None:
-    record.days = _dump_days(payload.days)
+    try:
+      set_days(record, payload.days)
+    except ValueError as exc:
+      raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
   if payload.difficulty is not None:
     record.difficulty = payload.difficulty
   if payload.active is not None:
@@ -75,20 +126,24 @@ async def update_routine(
     record.icon_key = payload.icon_key
 
   await session.commit()
+  cache.invalidate(record.user_id)
   await session.refresh(record)
-  return _routine_to_schema(record)
+  return routine_to_schema(record)
 
 
 @router.delete('/routines/{routine_id}', status_code=status.HTTP_204_NO_CONTENT)
 async def delete_routine(
   routine_id: int = Path(..., ge=1),
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> Response:
   record = await session.get(Routine, routine_id)
   if record is None:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Routine not found')
+  user_id = record.user_id
   await session.delete(record)
   await session.commit()
+  cache.invalidate(user_id)
   return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -96,55 +151,154 @@ async def delete_routine(
 async def patch_pet_state(
   payload: PetStatePatch,
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_pet_state_cache),
 ) -> PetStateSchema:
-  pet = await get_or_create_pet_state(session, payload.user_id)
-  if payload.level is not None:
-    pet.level = payload.level
-  if payload.xp is not None:
-    pet.xp = payload.xp
-  if payload.next_level_threshold is not None:
-    pet.next_level_threshold = payload.next_level_threshold
+  """``total_xp`` 또는 (level, xp)로 누적 XP를 정하고 나머지 필드는 레벨 곡선으로 맞춘다."""
+
+  pet = await get_or_create_pet_state(session, payload.user_id, for_update=True)
+  if payload.total_xp is not None:
+    total_xp = payload.total_xp
+  else:
+    level = payload.level if payload.level is not None else pet.level
+    xp = payload.xp if payload.xp is not None else pet.xp
+    curve = current_curve()
+    total_xp = curve.xp_before(level) + xp
+    if total_xp > MAX_TOTAL_XP:
+      max_level = curve.progress(MAX_TOTAL_XP).level
+      raise HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=f'level/xp exceed the maximum total_xp {MAX_TOTAL_XP} (level <= {max_level})',
+      )
+  apply_total_xp(pet, total_xp)
   await session.commit()
+  cache.invalidate(payload.user_id)
   await session.refresh(pet)
   return PetStateSchema.model_validate(pet)
 
 
+@dataclass
+class LogFilters:
+  """로그 조회 공통 필터. 모든 조건은 인덱스가 있는 컬럼에 걸린다."""
+
+  user_id: int | None = None
+  routine_id: int | None = None
+  status: str | None = None
+  started_from: datetime | None = None
+  started_to: datetime | None = None
+
+
+def _log_filters(
+  user_id: int | None = Query(default=None, ge=1),
+  routine_id: int | None = Query(default=None, ge=1),
+  status_value: str | None = Query(default=None, alias='status'),
+  started_from: datetime | None = Query(default=None, description='started_at 하한 (포함)'),
+  started_to: datetime | None = Query(default=None, description='started_at 상한 (미포함)'),
+) -> LogFilters:
+  return LogFilters(
+    user_id=user_id,
+    routine_id=routine_id,
+    status=status_value,
+    started_from=started_from.replace(tzinfo=None) if started_from else None,
+    started_to=started_to.replace(tzinfo=None) if started_to else None,
+  )
+
+
 @router.get('/logs', response_model=list[RoutineLogRead])
 async def list_logs(
+  response: Response,
   limit: int = Query(default=100, ge=1, le=500),
+  cursor: int | None = Query(default=None, ge=1, description='이전 페이지 X-Next-Cursor 값 (이 id 미만을 조회)'),
+  filters: LogFilters = Depends(_log_filters),
   session: AsyncSession = Depends(get_db),
 ) -> list[RoutineLogRead]:
-  result = await session.execute(
-    select(RoutineLog)
-    .order_by(RoutineLog.id.desc())
-    .limit(limit)
-  )
-  return [RoutineLogRead.model_validate(log) for log in result.scalars().all()]
-
-
-def _routine_to_schema(record: Routine) -> RoutineRead:
-  days = _load_days(record.days)
-  return RoutineRead(
-    id=record.id,
-    user_id=record.user_id,
-    title=record.title,
-    time=record.time,
-    days=days,
-    difficulty=record.difficulty,
-    active=record.active,
-    icon_key=record.icon_key,
-  )
+  """id 역순 keyset 페이지네이션. 다음 페이지가 있으면 ``X-Next-Cursor`` 헤더로 커서를 돌려준다."""
 
+  result = await session.execute(_log_page_query(filters, cursor, limit + 1))
+  logs = list(result.scalars().all())
+  if len(logs) > limit:
+    logs = logs[:limit]
+    response.headers['X-Next-Cursor'] = str(logs[-1].id)
+  return [RoutineLogRead.model_validate(log) for log in logs]
 
-def _dump_days(days: list[str]) -> str:
-  return json.dumps(days, ensure_ascii=False)
 
+@router.get('/logs/export')
+async def export_logs(
+  export_format: str = Query(default='ndjson', alias='format', pattern='^(ndjson|csv)$'),
+  filters: LogFilters = Depends(_log_filters),
+) -> StreamingResponse:
+  """필터에 맞는 전체 로그를 keyset 페이지 단위로 읽어 흘려보낸다. 메모리 사용량은 페이지 크기로 고정된다."""
 
-def _load_days(raw: str) -> list[str]:
-  try:
-    data = json.loads(raw)
-    if isinstance(data, list):
-      return [str(item) for item in data]
-  except json.JSONDecodeError:
-    pass
-  return [part.strip() for part in raw.split(',') if part.strip()]
+  if export_format == 'csv':
+    return StreamingResponse(
+      _export_csv(filters),
+      media_type='text/csv; charset=utf-8',
+      headers={'Content-Disposition': 'attachment; filename="routine_logs.csv"'},
+    )
+  return StreamingResponse(_export_ndjson(filters), media_type='application/x-ndjson')
+
+
+def _log_page_query(filters: LogFilters, cursor: int | None, limit: int):
+  query = select(RoutineLog)
+  if filters.user_id is not None:
+    query = query.where(RoutineLog.user_id == filters.user_id)
+  if filters.routine_id is not None:
+    query = query.where(RoutineLog.routine_id == filters.routine_id)
+  if filters.status is not None:
+    query = query.where(RoutineLog.status == filters.status)
+  if filters.started_from is not None:
+    query = query.where(RoutineLog.started_ts >= filters.started_from)
+  if filters.started_to is not None:
+    query = query.where(RoutineLog.started_ts < filters.started_to)
+  if cursor is not None:
+    query = query.where(RoutineLog.id < cursor)
+  return query.order_by(RoutineLog.id.desc()).limit(limit)
+
+
+async def _iter_log_pages(filters: LogFilters) -> AsyncIterator[list[RoutineLogRead]]:
+  cursor: int | None = None
+  while True:
+    # 요청 세션은 응답 스트리밍 전에 닫히므로 페이지마다 짧은 전용 세션을 연다.
+    async with SessionLocal() as session:
+      result = await session.execute(_log_page_query(filters, cursor, EXPORT_PAGE_SIZE))
+      page = [RoutineLogRead.model_validate(log) for log in result.scalars().all()]
+    if not page:
+      return
+    yield page
+    cursor = page[-1].id
+
+
+async def _stream_due_routines(reference: datetime, window_minutes: int) -> AsyncIterator[str]:
+  async with SessionLocal() as session:
+    for due in due_ranges(reference, window_minutes):
+      day_start = datetime.combine(due.day, datetime.min.time())
+      rows = await session.stream(due_routines_query(due).execution_options(yield_per=EXPORT_PAGE_SIZE))
+      async for partition in rows.partitions():
+        yield ''.join(
+          DueRoutine(
+            routine_id=row.id,
+            user_id=row.user_id,
+            title=row.title,
+            time=row.time,
+            due_at=day_start + timedelta(minutes=row.time_minutes),
+          ).model_dump_json()
+          + '\n'
+          for row in partition
+        )
+
+
+async def _export_ndjson(filters: LogFilters) -> AsyncIterator[str]:
+  async for page in _iter_log_pages(filters):
+    yield ''.join(log.model_dump_json() + '\n' for log in page)
+
+
+async def _export_csv(filters: LogFilters) -> AsyncIterator[str]:
+  fields = list(RoutineLogRead.model_fields)
+  buffer = io.StringIO()
+  writer = csv.DictWriter(buffer, fieldnames=fields)
+  writer.writeheader()
+  yield buffer.getvalue()
+  async for page in _iter_log_pages(filters):
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerows(log.model_dump() for log in page)
+    yield buffer.getvalue()
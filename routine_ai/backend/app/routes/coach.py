@@ -1,23 +1,84 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import AsyncIterator
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 
 from ..deps import get_ollama_client
+from ..metrics import counter, histogram
 from ..schemas.coach import CoachChatRequest, CoachChatResponse
 from ..services.ollama_client import OllamaClient, OllamaException
 
 router = APIRouter(prefix='/api/coach', tags=['coach'])
 
+FALLBACK_REPLY = '서버 연결에 문제가 있어요. 그래도 꾸준히 기록하면 좋은 루틴을 만들 수 있어요!'
+
+COACH_TTFT_SECONDS = histogram(
+  'coach_stream_time_to_first_token_seconds',
+  '코치 스트리밍 응답의 첫 토큰까지 걸린 시간',
+)
+COACH_STREAM_FALLBACKS = counter(
+  'coach_stream_fallbacks_total',
+  '업스트림 실패로 대체 메시지를 보낸 스트리밍 응답 수',
+)
+
 
 @router.post('/chat', response_model=CoachChatResponse)
 async def coach_chat(
   payload: CoachChatRequest,
   ollama: OllamaClient = Depends(get_ollama_client),
 ) -> CoachChatResponse:
-  prompt = (
+  prompt = _build_prompt(payload)
+  try:
+    reply = await ollama.generate(prompt)
+  except OllamaException:
+    reply = FALLBACK_REPLY
+  return CoachChatResponse(reply=reply)
+
+
+@router.post('/chat/stream')
+async def coach_chat_stream(
+  payload: CoachChatRequest,
+  ollama: OllamaClient = Depends(get_ollama_client),
+) -> StreamingResponse:
+  """``token`` 이벤트로 응답 조각을, 마지막에 ``done`` 이벤트를 보내는 SSE 스트림."""
+
+  return StreamingResponse(
+    _relay_tokens(ollama, _build_prompt(payload)),
+    media_type='text/event-stream',
+    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+  )
+
+
+def _build_prompt(payload: CoachChatRequest) -> str:
+  return (
     '당신은 건강 루틴 코치입니다. 사용자 메시지를 3문장 이내로 공감하며 답하세요.\n'
     f"사용자 메시지: {payload.message}\n"
   )
+
+
+async def _relay_tokens(ollama: OllamaClient, prompt: str) -> AsyncIterator[str]:
+  started = time.perf_counter()
+  ttft: float | None = None
   try:
-    reply = await ollama.generate(prompt)
+    async for token in ollama.generate_stream(prompt):
+      if ttft is None:
+        ttft = time.perf_counter() - started
+        COACH_TTFT_SECONDS.observe(ttft)
+      yield _sse('token', {'text': token})
   except OllamaException:
-    reply = '서버 연결에 문제가 있어요. 그래도 꾸준히 기록하면 좋은 루틴을 만들 수 있어요!'
-  return CoachChatResponse(reply=reply)
+    COACH_STREAM_FALLBACKS.inc()
+    if ttft is None:
+      yield _sse('token', {'text': FALLBACK_REPLY})
+    else:
+      # 이미 일부 토큰을 보냈으면 본문을 덮어쓰지 않고 오류만 알린다.
+      yield _sse('error', {'reply': FALLBACK_REPLY})
+  done = {'ttft_ms': round(ttft * 1000, 1) if ttft is not None else None}
+  yield _sse('done', done)
+
+
+def _sse(event: str, data: dict) -> str:
+  return f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Response
+
+from ..metrics import CONTENT_TYPE, render_text
+
+router = APIRouter(tags=['metrics'])
+
+
+@router.get('/metrics', include_in_schema=False)
+async def get_metrics() -> Response:
+  """프로세스 내 메트릭 레지스트리를 Prometheus 텍스트 형식으로 노출한다."""
+
+  return Response(content=render_text(), media_type=CONTENT_TYPE)
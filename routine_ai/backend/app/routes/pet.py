@@ -1,18 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..db import get_session
+from ..deps import get_pet_state_cache
 from ..schemas.pet import PetState as PetStateSchema
-from ..services.pet_state_service import get_or_create_pet_state
+from ..services.pet_state_service import load_pet_state
+from ..services.read_cache import ReadCache
 
 router = APIRouter(prefix='/api/pet', tags=['pet'])
 
 
 @router.get('/state', response_model=PetStateSchema)
 async def get_pet_state(
+  request: Request,
   user_id: int = Query(default=1, ge=1),
   session: AsyncSession = Depends(get_session),
-) -> PetStateSchema:
-  pet = await get_or_create_pet_state(session, user_id)
-  await session.commit()
-  return PetStateSchema.model_validate(pet)
+  cache: ReadCache = Depends(get_pet_state_cache),
+) -> Response:
+  """폴링용. 캐시된 직렬화 본문을 ETag와 함께 돌려주고, ``If-None-Match`` 가 같으면 304.
+
+  쓰기 트랜잭션을 열지 않는다. 펫 행이 없으면 기본 상태를 응답하고 생성은 첫 쓰기로 미룬다.
+  """
+
+  entry = cache.get(user_id)
+  if entry is None:
+    epoch = cache.epoch()
+    pet = await load_pet_state(session, user_id)
+    entry = cache.put(user_id, PetStateSchema.model_validate(pet), epoch)
+  return cache.respond(request, entry)
@@ -4,9 +4,11 @@ from typing import List
 
 from fastapi import APIRouter, Depends
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..deps import get_ollama_client
+from ..deps import get_db, get_llm_cache, get_ollama_client
 from ..schemas.recommend import Plan, RecommendRequest, RecommendResponse
+from ..services.llm_cache import LLMResponseCache
 from ..services.ollama_client import OllamaClient, OllamaException
 
 router = APIRouter(prefix='/api/recommend', tags=['recommend'])
@@ -16,8 +18,17 @@ router = APIRouter(prefix='/api/recommend', tags=['recommend'])
 async def generate_recommendations(
   payload: RecommendRequest,
   ollama: OllamaClient = Depends(get_ollama_client),
+  cache: LLMResponseCache = Depends(get_llm_cache),
+  session: AsyncSession = Depends(get_db),
 ) -> RecommendResponse:
   prompt = _build_prompt(payload)
+  cache_key = LLMResponseCache.key_for(ollama.model, prompt)
+  cached = await cache.get(session, cache_key)
+  if cached is not None:
+    return RecommendResponse(plans=_parse_plans(cached))
+  # LLM 생성 동안 풀 연결을 붙잡지 않는다. 캐시 저장 시 세션이 다시 연결을 연다.
+  await session.close()
+
   plans: List[Plan] = []
   try:
     raw = await ollama.generate(prompt)
@@ -26,6 +37,10 @@ async def generate_recommendations(
   except (OllamaException, ValueError, ValidationError):
     plans = []
 
+  if plans:
+    # 검증을 통과한 결과만 캐시한다. 대체 추천은 캐시하지 않는다.
+    await cache.set(session, cache_key, ollama.model, [plan.model_dump() for plan in plans])
+
   if not plans:
     plans = _fallback_plans(payload)
 
@@ -33,8 +48,8 @@ async def generate_recommendations(
 
 
 def _build_prompt(payload: RecommendRequest) -> str:
-  goals = ', '.join(payload.goals) or '미설정'
-  slots = ', '.join(payload.prefer_slots) or '미설정'
+  goals = ', '.join(_normalize_terms(payload.goals)) or '미설정'
+  slots = ', '.join(_normalize_terms(payload.prefer_slots)) or '미설정'
   return (
     '당신은 루틴 코치입니다. JSON만으로 답변하세요.\n'
     f'사용자 목표: {goals}\n'
@@ -44,6 +59,12 @@ def _build_prompt(payload: RecommendRequest) -> str:
   )
 
 
+def _normalize_terms(values: List[str]) -> List[str]:
+  """같은 조합이 같은 프롬프트(=같은 캐시 키)가 되도록 공백 정리, 중복 제거, 정렬한다."""
+
+  return sorted({' '.join(value.split()) for value in values if value.strip()})
+
+
 def _parse_plans(payload: object) -> List[Plan]:
   if isinstance(payload, dict):
     payload = payload.get('plans')
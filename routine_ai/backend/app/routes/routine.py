@@ -1,24 +1,39 @@
 from __future__ import annotations
 
-import json
+from typing import Awaitable, Callable, TypeVar
 
-from fastapi import APIRouter, Depends, HTTPException, Path, Query, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Path, Query, Request, Response, status
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.exc import StaleDataError
 
-from ..deps import get_db
+from ..deps import get_db, get_pet_state_cache, get_routine_list_cache
+from ..dialects import unique_violation_table
+from ..metrics import counter
+from ..models.pet_state import PetState
 from ..models.routine import Routine
 from ..models.routine_log import RoutineLog
 from ..schemas.pet import PetState as PetStateSchema
 from ..schemas.routine import (
+  RoutineCompleteBatchRequest,
+  RoutineCompleteBatchResponse,
+  RoutineCompleteItemResult,
   RoutineCompleteRequest,
   RoutineCompleteResponse,
+  RoutineCompleteUserResult,
   RoutineCreate,
   RoutineRead,
   RoutineUpdate,
 )
-from ..services.pet_state_service import get_or_create_pet_state
-from ..services.progress_service import calculate_streak
+from ..services.pet_progression import award_xp
+from ..services.pet_state_service import ensure_users, get_or_create_pet_state
+from ..services.progress_service import apply_logs_to_streak, update_streak
+from ..services.read_cache import ReadCache
+from ..services.rollup_service import increment_rollups
+from ..services.routine_log_service import build_routine_log
+from ..services.schedule import routine_to_schema, set_days, set_time
+from ..services.stats_service import invalidate_weekly_stats
 
 router = APIRouter(prefix='/api/routine', tags=['routine'])
 
@@ -29,36 +44,60 @@ XP_REWARD = {
   'miss': 0,
 }
 
+# 동시 완료 요청끼리 펫 버전이 충돌했을 때 처음부터 다시 시도하는 최대 횟수.
+COMPLETE_MAX_ATTEMPTS = 8
+
+# 동시 요청끼리 부딪혀 재시도하면 풀리는 유니크 충돌: 같은 idempotency_key 로그, 같은 사용자 펫 행의 동시 생성.
+RETRYABLE_UNIQUE_TABLES = frozenset({'routine_logs', 'pet_state'})
+
+T = TypeVar('T')
+
+COMPLETE_CONFLICTS = counter(
+  'routine_complete_conflicts_total', '완료 처리 중 충돌로 재시도한 횟수', ('reason',)
+)
+
 
 @router.get('', response_model=list[RoutineRead])
 async def list_routines(
+  request: Request,
   user_id: int = Query(default=1, ge=1),
   session: AsyncSession = Depends(get_db),
-) -> list[RoutineRead]:
-  result = await session.execute(
-    select(Routine).where(Routine.user_id == user_id).order_by(Routine.id)
-  )
-  return [_to_schema(record) for record in result.scalars().all()]
+  cache: ReadCache = Depends(get_routine_list_cache),
+) -> Response:
+  entry = cache.get(user_id)
+  if entry is None:
+    epoch = cache.epoch()
+    result = await session.execute(
+      select(Routine).where(Routine.user_id == user_id).order_by(Routine.id)
+    )
+    entry = cache.put(user_id, [routine_to_schema(record) for record in result.scalars().all()], epoch)
+  return cache.respond(request, entry)
 
 
 @router.post('', response_model=RoutineRead, status_code=status.HTTP_201_CREATED)
 async def create_routine(
   payload: RoutineCreate,
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> RoutineRead:
   record = Routine(
     user_id=payload.user_id,
     title=payload.title,
-    time=payload.time,
-    days=_dump_days(payload.days),
     difficulty=payload.difficulty,
     active=payload.active,
     icon_key=payload.icon_key,
   )
+  set_time(record, payload.time)
+  try:
+    set_days(record, payload.days)
+  except ValueError as exc:
+    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
+  await ensure_users(session, [record.user_id])
   session.add(record)
   await session.commit()
+  cache.invalidate(record.user_id)
   await session.refresh(record)
-  return _to_schema(record)
+  return routine_to_schema(record)
 
 
 @router.put('/{routine_id}', response_model=RoutineRead)
@@ -66,6 +105,7 @@ async def update_routine(
   payload: RoutineUpdate,
   routine_id: int = Path(..., ge=1),
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> RoutineRead:
   record = await session.get(Routine, routine_id)
   if record is None:
@@ -73,9 +113,12 @@ async def update_routine(
   if payload.title is not None:
     record.title = payload.title
   if payload.time is not None:
-    record.time = payload.time
+    set_time(record, payload.time)
   if payload.days is not None:
-    record.days = _dump_days(payload.days)
+    try:
+      set_days(record, payload.days)
+    except ValueError as exc:
+      raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
   if payload.difficulty is not None:
     record.difficulty = payload.difficulty
   if payload.active is not None:
@@ -83,20 +126,24 @@ async def update_routine(
   if payload.icon_key is not None:
     record.icon_key = payload.icon_key
   await session.commit()
+  cache.invalidate(record.user_id)
   await session.refresh(record)
-  return _to_schema(record)
+  return routine_to_schema(record)
 
 
 @router.delete('/{routine_id}', status_code=status.HTTP_204_NO_CONTENT)
 async def delete_routine(
   routine_id: int = Path(..., ge=1),
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_routine_list_cache),
 ) -> Response:
   record = await session.get(Routine, routine_id)
   if record is None:
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail='Routine not found')
+  user_id = record.user_id
   await session.delete(record)
   await session.commit()
+  cache.invalidate(user_id)
   return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -104,29 +151,43 @@ async def delete_routine(
 async def complete_routine(
   payload: RoutineCompleteRequest,
   session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_pet_state_cache),
 ) -> RoutineCompleteResponse:
-  pet = await get_or_create_pet_state(session, payload.user_id)
-  xp_gain = XP_REWARD.get(payload.status, 0)
-  pet.xp += xp_gain
-  leveled_up = False
-  while pet.xp >= pet.next_level_threshold:
-    pet.xp -= pet.next_level_threshold
-    pet.level += 1
-    pet.next_level_threshold += 50
-    leveled_up = True
-
-  log = RoutineLog(
-    user_id=payload.user_id,
-    routine_id=payload.routine_id,
-    status=payload.status,
-    started_at=payload.started_at,
-    ended_at=payload.ended_at,
-    note=payload.note,
-  )
+  response = await _retry_on_conflict(session, lambda: _complete_once(session, payload))
+  cache.invalidate(payload.user_id)
+  return response
+
+
+async def _complete_once(session: AsyncSession, payload: RoutineCompleteRequest) -> RoutineCompleteResponse:
+  if payload.idempotency_key is not None:
+    key = (payload.user_id, payload.idempotency_key)
+    logged = await _logs_by_key(session, [key])
+    if key in logged:
+      pet = await get_or_create_pet_state(session, payload.user_id)
+      await session.commit()
+      _, status_value = logged[key]
+      return RoutineCompleteResponse(
+        pet_state=PetStateSchema.model_validate(pet),
+        streak=pet.streak,
+        coach_hint=_coach_hint(status_value, XP_REWARD.get(status_value, 0), False),
+        replayed=True,
+      )
+
+  # 로그를 먼저 넣어 쓰기 트랜잭션을 연 뒤 펫을 읽는다. SQLite는 쓰기 잠금을 쥔 동안 다른 쓰기가
+  # 끼어들 수 없고, PostgreSQL은 FOR UPDATE 행 잠금이 같은 펫의 쓰기를 줄 세운다. 남는 경합은 version 검사가 잡는다.
+  # 처음 보는 사용자면 로그의 user_id FK가 가리킬 users 행부터 만든다.
+  await ensure_users(session, [payload.user_id])
+  log = build_routine_log(payload)
   session.add(log)
   await session.flush()
 
-  streak = await calculate_streak(session, payload.user_id)
+  pet = await get_or_create_pet_state(session, payload.user_id, for_update=True)
+  xp_gain = XP_REWARD.get(payload.status, 0)
+  leveled_up = award_xp(pet, xp_gain)
+
+  streak = await update_streak(session, pet, log.status, log.ended_ts)
+  await increment_rollups(session, [log])
+  await invalidate_weekly_stats(session, payload.user_id, [log.started_ts])
   await session.commit()
 
   hint = _coach_hint(payload.status, xp_gain, leveled_up)
@@ -137,6 +198,134 @@ async def complete_routine(
   )
 
 
+@router.post('/complete/batch', response_model=RoutineCompleteBatchResponse)
+async def complete_routine_batch(
+  payload: RoutineCompleteBatchRequest,
+  session: AsyncSession = Depends(get_db),
+  cache: ReadCache = Depends(get_pet_state_cache),
+) -> RoutineCompleteBatchResponse:
+  """오프라인에서 쌓인 완료 기록을 한 트랜잭션으로 반영한다. XP는 요청 순서대로 적용된다.
+
+  이미 반영된(또는 같은 배치 안에서 앞서 나온) ``idempotency_key`` 항목은 기록/XP 없이 ``replayed`` 로 돌려준다.
+  """
+
+  response = await _retry_on_conflict(session, lambda: _complete_batch_once(session, payload))
+  cache.invalidate(*{item.user_id for item in payload.items})
+  return response
+
+
+async def _complete_batch_once(
+  session: AsyncSession,
+  payload: RoutineCompleteBatchRequest,
+) -> RoutineCompleteBatchResponse:
+  logged = await _logs_by_key(
+    session,
+    [(item.user_id, item.idempotency_key) for item in payload.items if item.idempotency_key is not None],
+  )
+  pending: dict[tuple[int, str], RoutineLog] = {}
+  logs: list[RoutineLog | None] = []
+  for item in payload.items:
+    key = (item.user_id, item.idempotency_key)
+    if item.idempotency_key is not None and (key in logged or key in pending):
+      logs.append(None)
+      continue
+    log = build_routine_log(item)
+    logs.append(log)
+    if item.idempotency_key is not None:
+      pending[key] = log
+  new_logs = [log for log in logs if log is not None]
+  await ensure_users(session, [log.user_id for log in new_logs])
+  session.add_all(new_logs)
+  await session.flush()
+
+  # 단건 완료와 같은 이유로 펫은 로그를 넣은 뒤에 읽는다. 잠금은 사용자 id 순서로 잡아 배치끼리 교착되지 않게 한다.
+  user_ids = list(dict.fromkeys(item.user_id for item in payload.items))
+  locked = {user_id: await get_or_create_pet_state(session, user_id, for_update=True) for user_id in sorted(user_ids)}
+  pets: dict[int, PetState] = {user_id: locked[user_id] for user_id in user_ids}
+
+  await increment_rollups(session, new_logs)
+
+  results: list[RoutineCompleteItemResult] = []
+  for item, log in zip(payload.items, logs):
+    if log is None:
+      key = (item.user_id, item.idempotency_key)
+      log_id = logged[key][0] if key in logged else pending[key].id
+      results.append(
+        RoutineCompleteItemResult(
+          log_id=log_id,
+          user_id=item.user_id,
+          routine_id=item.routine_id,
+          xp_gain=0,
+          leveled_up=False,
+          replayed=True,
+        )
+      )
+      continue
+    xp_gain = XP_REWARD.get(item.status, 0)
+    leveled_up = award_xp(pets[item.user_id], xp_gain)
+    results.append(
+      RoutineCompleteItemResult(
+        log_id=log.id,
+        user_id=item.user_id,
+        routine_id=item.routine_id,
+        xp_gain=xp_gain,
+        leveled_up=leveled_up,
+        coach_hint=_coach_hint(item.status, xp_gain, leveled_up),
+      )
+    )
+
+  users: list[RoutineCompleteUserResult] = []
+  for user_id, pet in pets.items():
+    user_logs = [log for log in new_logs if log.user_id == user_id]
+    streak = await apply_logs_to_streak(session, pet, [(log.status, log.ended_ts) for log in user_logs])
+    await invalidate_weekly_stats(session, user_id, [log.started_ts for log in user_logs])
+    users.append(
+      RoutineCompleteUserResult(user_id=user_id, pet_state=PetStateSchema.model_validate(pet), streak=streak)
+    )
+  await session.commit()
+  return RoutineCompleteBatchResponse(results=results, users=users)
+
+
+async def _retry_on_conflict(session: AsyncSession, attempt: Callable[[], Awaitable[T]]) -> T:
+  """펫 버전 충돌(StaleDataError)이나 펫 동시 생성/같은 키 중복(유니크 위반) 시 롤백 후 처음부터 다시 실행한다.
+
+  재시도는 최신 행을 다시 읽으므로 XP 가산이 유실되지 않고, 같은 키의 두 번째 요청은 재실행 시 replay로 끝난다.
+  FK 위반처럼 다시 해도 똑같이 실패할 무결성 오류는 재시도하지 않고 그대로 올린다.
+  """
+
+  for _ in range(COMPLETE_MAX_ATTEMPTS):
+    try:
+      return await attempt()
+    except StaleDataError:
+      COMPLETE_CONFLICTS.inc(reason='version')
+      await session.rollback()
+    except IntegrityError as exc:
+      await session.rollback()
+      if unique_violation_table(exc) not in RETRYABLE_UNIQUE_TABLES:
+        raise
+      COMPLETE_CONFLICTS.inc(reason='integrity')
+  raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail='Concurrent update, please retry')
+
+
+async def _logs_by_key(session: AsyncSession, keys: list[tuple[int, str]]) -> dict[tuple[int, str], tuple[int, str]]:
+  """(user_id, idempotency_key) → (log id, status). 한 번의 인덱스 조회로 읽는다."""
+
+  if not keys:
+    return {}
+  wanted = set(keys)
+  result = await session.execute(
+    select(RoutineLog.user_id, RoutineLog.idempotency_key, RoutineLog.id, RoutineLog.status).where(
+      RoutineLog.user_id.in_({user_id for user_id, _ in wanted}),
+      RoutineLog.idempotency_key.in_({key for _, key in wanted}),
+    )
+  )
+  return {
+    (user_id, key): (log_id, status_value)
+    for user_id, key, log_id, status_value in result.all()
+    if (user_id, key) in wanted
+  }
+
+
 def _coach_hint(status_value: str, xp_gain: int, leveled_up: bool) -> str:
   if leveled_up:
     return '레벨이 상승했어요! 새로운 보상을 준비 중입니다.'
@@ -145,30 +334,3 @@ def _coach_hint(status_value: str, xp_gain: int, leveled_up: bool) -> str:
   if xp_gain >= 10:
     return '완벽해요! 지금 리듬을 그대로 이어가요.'
   return '조금 더 힘내면 금방 목표에 도달할 수 있어요.'
-
-
-def _to_schema(record: Routine) -> RoutineRead:
-  return RoutineRead(
-    id=record.id,
-    user_id=record.user_id,
-    title=record.title,
-    time=record.time,
-    days=_load_days(record.days),
-    difficulty=record.difficulty,
-    active=record.active,
-    icon_key=record.icon_key,
-  )
-
-
-def _dump_days(days: list[str]) -> str:
-  return json.dumps(days, ensure_ascii=False)
-
-
-def _load_days(raw: str) -> list[str]:
-  try:
-    data = json.loads(raw)
-    if isinstance(data, list):
-      return [str(item) for item in data]
-  except json.JSONDecodeError:
-    pass
-  return [part.strip() for part in raw.split(',') if part.strip()]
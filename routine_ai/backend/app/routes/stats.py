@@ -1,21 +1,35 @@
 from __future__ import annotations
 
 import json
-from datetime import date, datetime, timedelta
-from typing import List
+from datetime import date, datetime, time, timedelta
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..db import SessionLocal
 from ..deps import get_db
-from ..models.routine_log import RoutineLog
+from ..dialects import upsert_insert
+from ..metrics import counter
 from ..models.stats_cache import StatsCache
-from ..schemas.stats import StatsWeeklyResponse
-from ..services.progress_service import calculate_streak
+from ..models.user import User
+from ..schemas.stats import StatsBucket, StatsRangeResponse, StatsWeeklyResponse
+from ..services.pet_state_service import ensure_users
+from ..services.progress_service import calculate_streak, streak_history
+from ..services.rollup_service import RollupSummary, daily_summaries, summarize_range
+from ..services.single_flight import SingleFlight
+from ..services.stats_service import week_start_of
 
 router = APIRouter(prefix='/api/stats', tags=['stats'])
 
+_stats_flights: SingleFlight[StatsWeeklyResponse] = SingleFlight('weekly_stats')
+
+MAX_RANGE_DAYS = 3 * 366
+
+STATS_CACHE_HITS = counter('stats_cache_hits_total', '주간 통계 캐시(stats_cache) 적중 수')
+STATS_CACHE_MISSES = counter('stats_cache_misses_total', '주간 통계 캐시(stats_cache) 미스 수')
+
 
 @router.get('/weekly', response_model=StatsWeeklyResponse)
 async def get_weekly_stats(
@@ -25,10 +39,63 @@ async def get_weekly_stats(
   week_start = _current_week_start()
   cached = await _load_cache(session, user_id, week_start)
   if cached:
+    STATS_CACHE_HITS.inc()
     return cached
+  STATS_CACHE_MISSES.inc()
 
-  stats = await _build_stats(session, user_id, week_start)
-  return stats
+  # 합쳐진 빌드를 기다리는 동안 풀 연결을 붙잡지 않도록 이 요청의 연결을 먼저 반납한다.
+  await session.close()
+  return await _stats_flights.do((user_id, week_start), lambda: _build_stats_isolated(user_id, week_start))
+
+
+@router.get('/range', response_model=StatsRangeResponse)
+async def get_range_stats(
+  from_date: date = Query(..., alias='from', description='시작일 (포함)'),
+  to_date: date = Query(..., alias='to', description='종료일 (포함)'),
+  granularity: Literal['day', 'week'] = Query(default='week'),
+  user_id: int = Query(default=1, ge=1),
+  session: AsyncSession = Depends(get_db),
+) -> StatsRangeResponse:
+  """기간별 완료율/시간대 분포/streak 추이. week 단위는 월요일 시작 주로 범위를 넓혀 나눈다."""
+
+  if granularity == 'week':
+    from_date = week_start_of(from_date)
+    to_date = week_start_of(to_date) + timedelta(days=6)
+  if to_date < from_date or (to_date - from_date).days >= MAX_RANGE_DAYS:
+    raise HTTPException(
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+      detail=f'range must be 1..{MAX_RANGE_DAYS} days',
+    )
+
+  step = timedelta(days=7 if granularity == 'week' else 1)
+  starts: list[date] = []
+  cursor = from_date
+  while cursor <= to_date:
+    starts.append(cursor)
+    cursor += step
+  end = starts[-1] + step
+
+  days = await daily_summaries(session, user_id, from_date, end)
+  buckets = [RollupSummary() for _ in starts]
+  for day, summary in days.items():
+    buckets[(day - from_date) // step].add(summary)
+  streaks = await streak_history(session, user_id, [datetime.combine(start + step, time.min) for start in starts])
+
+  return StatsRangeResponse(
+    granularity=granularity,
+    buckets=[
+      StatsBucket(
+        start=start,
+        end=start + step - timedelta(days=1),
+        total=summary.total,
+        done=summary.done,
+        completion_rate=summary.completion,
+        slots=dict(summary.done_by_slot),
+        streak=streak,
+      )
+      for start, summary, streak in zip(starts, buckets, streaks)
+    ],
+  )
 
 
 async def _load_cache(session: AsyncSession, user_id: int, week_start: date) -> StatsWeeklyResponse | None:
@@ -41,6 +108,8 @@ async def _load_cache(session: AsyncSession, user_id: int, week_start: date) ->
   record = result.scalars().first()
   if record is None:
     return None
+  # streak는 주간 집계가 아니라 현재 값이므로 캐시가 아닌 저장된 streak에서 읽는다.
+  streak = await calculate_streak(session, user_id)
 
   insights_payload = _safe_json(record.insights_json)
   tips_payload = _safe_json(record.tips_json)
@@ -48,33 +117,42 @@ async def _load_cache(session: AsyncSession, user_id: int, week_start: date) ->
   best_slots = insights_payload.get('best_slots') if isinstance(insights_payload, dict) else []
   return StatsWeeklyResponse(
     completion_rate=record.completion_rate,
-    streak=record.streak,
+    streak=streak,
     best_slots=_ensure_str_list(best_slots),
     insights=_ensure_str_list(insights),
     tips=_ensure_str_list(tips_payload),
   )
 
 
+async def _build_stats_isolated(user_id: int, week_start: date) -> StatsWeeklyResponse:
+  # 합쳐진 호출자들이 공유하므로 특정 요청의 세션이 아닌 전용 세션에서 만든다.
+  async with SessionLocal() as session:
+    return await _build_stats(session, user_id, week_start)
+
+
 async def _build_stats(session: AsyncSession, user_id: int, week_start: date) -> StatsWeeklyResponse:
-  logs = await _weekly_logs(session, user_id, week_start)
-  total = len(logs)
-  done = sum(1 for log in logs if log.status == 'done')
-  half = sum(1 for log in logs if log.status in {'partial', 'late'}) * 0.5
-  completion = (done + half) / total if total else 0.0
+  # 집계를 읽기 전의 캐시 세대. 읽는 사이 완료 기록이 캐시를 무효화했으면 이 결과는 캐시에 쓰지 않는다.
+  generation = await session.scalar(select(User.stats_version).where(User.id == user_id)) or 0
+  summary = await summarize_range(session, user_id, week_start, week_start + timedelta(days=7))
+  completion = summary.completion
   streak = await calculate_streak(session, user_id)
-  best_slots = _best_slots(logs)
-  insights = _build_insights(completion, done)
+  best_slots = summary.best_slots()
+  insights = _build_insights(completion, summary.done)
   tips = _build_tips(best_slots)
 
-  record = StatsCache(
-    user_id=user_id,
-    week_start=week_start.isoformat(),
-    completion_rate=completion,
-    streak=streak,
-    insights_json=json.dumps({'insights': insights, 'best_slots': best_slots}, ensure_ascii=False),
-    tips_json=json.dumps(tips, ensure_ascii=False),
-  )
-  session.add(record)
+  values = {
+    'completion_rate': completion,
+    'streak': streak,
+    'insights_json': json.dumps({'insights': insights, 'best_slots': best_slots}, ensure_ascii=False),
+    'tips_json': json.dumps(tips, ensure_ascii=False),
+  }
+  # 아직 아무것도 쓰지 않은 사용자도 조회할 수 있으므로 캐시 행의 user_id FK가 가리킬 행을 만든다.
+  await ensure_users(session, [user_id])
+  if await _lock_generation(session, user_id, generation):
+    statement = upsert_insert(session, StatsCache).values(user_id=user_id, week_start=week_start.isoformat(), **values)
+    await session.execute(
+      statement.on_conflict_do_update(index_elements=['user_id', 'week_start'], set_=values)
+    )
   await session.commit()
 
   return StatsWeeklyResponse(
@@ -86,46 +164,17 @@ async def _build_stats(session: AsyncSession, user_id: int, week_start: date) ->
   )
 
 
-async def _weekly_logs(session: AsyncSession, user_id: int, week_start: date) -> List[RoutineLog]:
-  week_end = week_start + timedelta(days=7)
-  result = await session.execute(select(RoutineLog).where(RoutineLog.user_id == user_id))
-  logs: List[RoutineLog] = []
-  for log in result.scalars():
-    try:
-      started = datetime.fromisoformat(log.started_at)
-    except ValueError:
-      continue
-    if week_start <= started.date() < week_end:
-      logs.append(log)
-  return logs
-
-
-def _best_slots(logs: List[RoutineLog]) -> List[str]:
-  buckets: dict[str, int] = {}
-  for log in logs:
-    if log.status != 'done':
-      continue
-    try:
-      started = datetime.fromisoformat(log.started_at)
-    except ValueError:
-      continue
-    label = _slot_label(started)
-    buckets[label] = buckets.get(label, 0) + 1
-  sorted_labels = sorted(buckets.items(), key=lambda item: item[1], reverse=True)
-  return [label for label, _ in sorted_labels][:3]
-
-
-def _slot_label(value: datetime) -> str:
-  hour = value.hour
-  if 5 <= hour < 11:
-    return '아침'
-  if 11 <= hour < 14:
-    return '점심'
-  if 14 <= hour < 18:
-    return '오후'
-  if 18 <= hour < 22:
-    return '저녁'
-  return '밤'
+async def _lock_generation(session: AsyncSession, user_id: int, generation: int) -> bool:
+  """캐시 세대가 아직 ``generation`` 이면 커밋까지 users 행을 FOR SHARE로 잡고 True를 돌려준다.
+
+  PostgreSQL에서 진행 중인 무효화가 있으면 그 커밋을 기다린 뒤 새 세대로 다시 비교하고, 잠근 뒤 시작한 무효화는 이
+  트랜잭션이 커밋할 때까지 기다렸다가 방금 쓴 캐시를 지운다. SQLite는 쓰기 트랜잭션이 직렬화되어 FOR SHARE 없이도 같다.
+  """
+
+  current = await session.scalar(
+    select(User.id).where(User.id == user_id, User.stats_version == generation).with_for_update(read=True)
+  )
+  return current is not None
 
 
 def _build_insights(completion: float, done_count: int) -> List[str]:
@@ -163,5 +212,4 @@ def _ensure_str_list(value: object) -> List[str]:
 
 
 def _current_week_start() -> date:
-  today = date.today()
-  return today - timedelta(days=today.weekday())
+  return week_start_of(date.today())
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, ConfigDict, Field
 
+from ..models.pet_state import MAX_TOTAL_XP
+
 
 class PetState(BaseModel):
   """펫 상태 응답."""
@@ -9,14 +11,20 @@ class PetState(BaseModel):
   level: int = Field(..., ge=0)
   xp: int = Field(..., ge=0)
   next_level_threshold: int = Field(..., ge=1)
+  total_xp: int = Field(default=0, ge=0)
 
 
 class PetStatePatch(BaseModel):
-  """관리자용 펫 상태 수정 요청."""
+  """관리자용 펫 상태 수정 요청.
+
+  상한은 저장 가능한 누적 XP 기준이다. (level, xp)로 준 값이 곡선상 ``MAX_TOTAL_XP`` 를 넘는지는 라우트에서 확인한다.
+  """
 
   model_config = ConfigDict(populate_by_name=True)
 
   user_id: int = Field(default=1, ge=1)
-  level: int | None = Field(default=None, ge=1)
-  xp: int | None = Field(default=None, ge=0)
+  total_xp: int | None = Field(default=None, ge=0, le=MAX_TOTAL_XP)
+  level: int | None = Field(default=None, ge=1, le=MAX_TOTAL_XP)
+  xp: int | None = Field(default=None, ge=0, le=MAX_TOTAL_XP)
+  # 레벨 곡선에서 계산되는 값이라 반영하지 않는다. 기존 클라이언트 호환용으로만 받는다.
   next_level_threshold: int | None = Field(default=None, ge=1)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List
 
 from pydantic import BaseModel, ConfigDict, Field
@@ -43,12 +44,40 @@ class RoutineCompleteRequest(BaseModel):
   started_at: str
   ended_at: str
   note: str | None = None
+  # 같은 사용자 안에서 유일. 이미 반영된 키로 다시 보내면 기록/XP 없이 현재 상태만 돌려준다.
+  idempotency_key: str | None = Field(default=None, min_length=1, max_length=64)
 
 
 class RoutineCompleteResponse(BaseModel):
   pet_state: PetState
   streak: int
   coach_hint: str | None = None
+  replayed: bool = False
+
+
+class RoutineCompleteBatchRequest(BaseModel):
+  items: List[RoutineCompleteRequest] = Field(..., min_length=1, max_length=500)
+
+
+class RoutineCompleteItemResult(BaseModel):
+  log_id: int
+  user_id: int
+  routine_id: int
+  xp_gain: int
+  leveled_up: bool
+  coach_hint: str | None = None
+  replayed: bool = False
+
+
+class RoutineCompleteUserResult(BaseModel):
+  user_id: int
+  pet_state: PetState
+  streak: int
+
+
+class RoutineCompleteBatchResponse(BaseModel):
+  results: List[RoutineCompleteItemResult]
+  users: List[RoutineCompleteUserResult]
 
 
 class RoutineLogRead(BaseModel):
@@ -61,3 +90,11 @@ class RoutineLogRead(BaseModel):
   started_at: str
   ended_at: str
   note: str | None = None
+
+
+class DueRoutine(BaseModel):
+  routine_id: int
+  user_id: int
+  title: str
+  time: str
+  due_at: datetime
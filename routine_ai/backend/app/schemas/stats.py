@@ -1,4 +1,5 @@
-from typing import List
+from datetime import date
+from typing import Dict, List
 
 from pydantic import BaseModel, Field
 
@@ -9,3 +10,18 @@ class StatsWeeklyResponse(BaseModel):
   best_slots: List[str]
   insights: List[str]
   tips: List[str]
+
+
+class StatsBucket(BaseModel):
+  start: date
+  end: date
+  total: int = Field(..., ge=0)
+  done: int = Field(..., ge=0)
+  completion_rate: float = Field(..., ge=0)
+  slots: Dict[str, int]
+  streak: int = Field(..., ge=0)
+
+
+class StatsRangeResponse(BaseModel):
+  granularity: str
+  buckets: List[StatsBucket]
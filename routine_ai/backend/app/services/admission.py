@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from ..metrics import counter, gauge, histogram
+
+ADMISSION_QUEUE_DEPTH = gauge('admission_queue_depth', '실행 슬롯을 기다리는 요청 수', ('pool',))
+ADMISSION_IN_FLIGHT = gauge('admission_in_flight', '실행 중인 요청 수', ('pool',))
+ADMISSION_WAIT_SECONDS = histogram(
+  'admission_queue_wait_seconds',
+  '실행 슬롯을 얻기까지 기다린 시간',
+  ('pool',),
+  buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+ADMISSION_REJECTED = counter('admission_rejected_total', '대기열에서 거절된 요청 수', ('pool', 'reason'))
+
+
+class AdmissionRejected(RuntimeError):
+  """대기열이 가득 찼거나 대기 기한을 넘겨 실행 슬롯을 얻지 못했다."""
+
+  def __init__(self, reason: str) -> None:
+    super().__init__(reason)
+    self.reason = reason
+
+
+class AdmissionController:
+  """동시 실행 수를 제한하고, 제한된 길이의 대기열과 대기 기한을 두는 비동기 입장 제어기."""
+
+  def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float) -> None:
+    self._name = name
+    self._semaphore = asyncio.Semaphore(max(max_in_flight, 1))
+    self._max_queue = max(max_queue, 0)
+    self._queue_timeout = queue_timeout
+    self._waiting = 0
+
+  @property
+  def waiting(self) -> int:
+    return self._waiting
+
+  @asynccontextmanager
+  async def slot(self) -> AsyncIterator[None]:
+    await self._acquire()
+    ADMISSION_IN_FLIGHT.inc(pool=self._name)
+    try:
+      yield
+    finally:
+      ADMISSION_IN_FLIGHT.dec(pool=self._name)
+      self._semaphore.release()
+
+  async def _acquire(self) -> None:
+    if not self._semaphore.locked():
+      await self._semaphore.acquire()
+      ADMISSION_WAIT_SECONDS.observe(0.0, pool=self._name)
+      return
+    if self._waiting >= self._max_queue:
+      ADMISSION_REJECTED.inc(pool=self._name, reason='queue_full')
+      raise AdmissionRejected('queue_full')
+
+    started = time.perf_counter()
+    self._waiting += 1
+    ADMISSION_QUEUE_DEPTH.set(self._waiting, pool=self._name)
+    try:
+      await asyncio.wait_for(self._semaphore.acquire(), timeout=self._queue_timeout)
+    except asyncio.TimeoutError:
+      ADMISSION_REJECTED.inc(pool=self._name, reason='timeout')
+      raise AdmissionRejected('timeout') from None
+    finally:
+      self._waiting -= 1
+      ADMISSION_QUEUE_DEPTH.set(self._waiting, pool=self._name)
+      ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - started, pool=self._name)
@@ -0,0 +1,191 @@
+"""워커 간 읽기 캐시 무효화 채널.
+
+멀티 워커 배포에서는 ``ReadCache`` 가 워커마다 따로 있으므로, 한 워커가 커밋한 변경을 다른 워커의
+캐시에서도 지워야 한다. 별도 브로커 없이 같은 DB의 ``cache_events`` 테이블을 채널로 쓴다.
+
+- 발행: ``ReadCache.invalidate`` 가 부르면 대기열에 넣고, 백그라운드 루프가 곧바로 깨어나 한 트랜잭션으로 기록한다.
+- 구독: ``poll_interval`` 마다 다른 워커가 남긴 새 이벤트를 읽어 해당 키를 ``drop`` 한다. SQLite에서는
+  전용 연결의 ``PRAGMA data_version`` 이 그대로면(다른 연결의 커밋이 없었으면) 조회 자체를 건너뛴다.
+  PostgreSQL 등에서는 id 순서와 커밋 순서가 다를 수 있어, 최근 ``REORDER_WINDOW_SECONDS`` 구간을 매번 다시 읽고
+  이미 반영한 id만 거른다. 조회마다 짧은 세션을 써서 트랜잭션을 열어 둔 채 두지 않는다.
+- 정리: ``retention`` 보다 오래된 이벤트는 발행하는 김에 주기적으로 지운다.
+
+다른 워커의 변경은 대략 ``poll_interval`` 안에 반영되며, 이벤트를 놓치더라도 캐시 TTL이 상한이다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from contextlib import suppress
+from datetime import datetime, timedelta
+from typing import Hashable, Sequence
+
+from sqlalchemy import delete, func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..metrics import counter
+from ..models.cache_event import CacheEvent
+from .read_cache import ReadCache
+
+logger = logging.getLogger(__name__)
+
+CACHE_BUS_EVENTS = counter('cache_bus_events_total', '워커 간 캐시 무효화 이벤트 수', ('direction',))
+CACHE_BUS_POLLS = counter(
+  'cache_bus_polls_total',
+  '캐시 이벤트 폴링 수 (skipped: data_version이 그대로라 조회 생략)',
+  ('result',),
+)
+PRUNE_INTERVAL_SECONDS = 60.0
+# 발행 시각(created_at)을 정한 뒤 커밋까지 걸릴 수 있는 최대 시간. 이보다 늦게 커밋된 이벤트는 TTL에 맡긴다.
+REORDER_WINDOW_SECONDS = 5.0
+
+
+class CacheBus:
+  """``cache_events`` 테이블로 ``ReadCache`` 무효화를 주고받는다. ``run`` 을 lifespan 작업으로 띄운다."""
+
+  def __init__(
+    self,
+    session_factory,
+    caches: Sequence[ReadCache],
+    poll_interval_seconds: float,
+    retention_seconds: float,
+  ) -> None:
+    self._session_factory = session_factory
+    self._caches = {cache.name: cache for cache in caches}
+    self._poll_interval = poll_interval_seconds
+    self._retention = timedelta(seconds=retention_seconds)
+    self._origin = uuid.uuid4().hex
+    # 같은 키를 여러 번 무효화해도 한 번만 기록하도록 순서 있는 집합으로 쓴다.
+    self._pending: dict[tuple[str, str | None], None] = {}
+    self._wakeup = asyncio.Event()
+    self._last_id = 0
+    self._data_version: int | None = None
+    # id 커서를 쓸 수 없는 방언에서 최근 구간에 이미 반영한 이벤트 (id -> created_at)
+    self._seen_at = datetime.utcnow()
+    self._applied: dict[int, datetime] = {}
+    self._pruned_at = 0.0
+    for cache in caches:
+      cache.subscribe(self.publish)
+
+  def publish(self, cache: str, keys: tuple[Hashable, ...] | None) -> None:
+    if keys is None:
+      self._pending[(cache, None)] = None
+    else:
+      for key in keys:
+        self._pending[(cache, json.dumps(key))] = None
+    self._wakeup.set()
+
+  async def run(self) -> None:
+    async with self._session_factory() as session:
+      self._last_id = (await session.execute(select(func.max(CacheEvent.id)))).scalar() or 0
+      if session.bind.dialect.name == 'sqlite':
+        await self._loop(watcher=session)
+        return
+    await self._loop(watcher=None)
+
+  async def _loop(self, watcher: AsyncSession | None) -> None:
+    # data_version은 연결 단위 값이라 SQLite에서는 같은 연결(watcher)을 계속 쓴다. 세션을 커밋/롤백하지 않는
+    # 한 연결이 유지되고, 읽기만 하므로 쓰기 잠금이나 WAL 체크포인트를 막지 않는다. 다른 방언에서는 오래 열린
+    # 트랜잭션이 vacuum과 ``CREATE INDEX CONCURRENTLY`` 를 막으므로 조회마다 세션을 새로 연다.
+    while True:
+      with suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(self._wakeup.wait(), self._poll_interval)
+      try:
+        await self.flush()
+        if watcher is not None:
+          await self._poll_sqlite(watcher)
+        else:
+          async with self._session_factory() as session:
+            await self._poll_window(session)
+      except asyncio.CancelledError:
+        raise
+      except Exception:  # pragma: no cover - 다음 주기에 다시 시도한다. 그 사이 누락분은 TTL이 막는다.
+        logger.exception('cache bus iteration failed')
+        if watcher is not None:
+          await watcher.rollback()
+        self._data_version = None
+
+  async def flush(self) -> None:
+    """대기 중인 무효화를 기록한다. 실패하면 다음 시도를 위해 대기열로 되돌린다."""
+
+    self._wakeup.clear()
+    if not self._pending:
+      return
+    pending, self._pending = self._pending, {}
+    now = datetime.utcnow()
+    try:
+      async with self._session_factory() as session:
+        await session.execute(
+          insert(CacheEvent),
+          [{'cache': cache, 'key': key, 'origin': self._origin, 'created_at': now} for cache, key in pending],
+        )
+        if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+          await session.execute(delete(CacheEvent).where(CacheEvent.created_at < now - self._retention))
+          self._pruned_at = time.monotonic()
+        await session.commit()
+    except BaseException:
+      self._pending = {**pending, **self._pending}
+      raise
+    CACHE_BUS_EVENTS.inc(len(pending), direction='published')
+
+  async def _poll_sqlite(self, watcher: AsyncSession) -> None:
+    version = (await watcher.execute(text('PRAGMA data_version'))).scalar()
+    if version == self._data_version:
+      CACHE_BUS_POLLS.inc(result='skipped')
+      return
+    self._data_version = version
+    CACHE_BUS_POLLS.inc(result='queried')
+    # SQLite는 쓰기가 한 번에 하나씩 직렬화되어 id가 커밋 순서대로 늘어나므로 id 커서만으로 빠짐없이 읽는다.
+    # 이 가정은 SQLite에서만 성립한다 (시퀀스 기반 DB는 ``_poll_window``).
+    result = await watcher.execute(
+      select(CacheEvent.id, CacheEvent.cache, CacheEvent.key)
+      .where(CacheEvent.id > self._last_id, CacheEvent.origin != self._origin)
+      .order_by(CacheEvent.id)
+    )
+    rows = result.all()
+    if rows:
+      self._apply(rows)
+      self._last_id = rows[-1].id
+
+  async def _poll_window(self, session: AsyncSession) -> None:
+    """시퀀스 id는 커밋 순서와 다를 수 있다. 작은 id가 나중에 커밋되면 id 커서로는 영영 건너뛰므로,
+    마지막으로 본 발행 시각에서 ``REORDER_WINDOW_SECONDS`` 만큼 되돌아간 구간을 매번 다시 읽고
+    이미 반영한 id는 거른다.
+    """
+
+    CACHE_BUS_POLLS.inc(result='queried')
+    since = self._seen_at - timedelta(seconds=REORDER_WINDOW_SECONDS)
+    result = await session.execute(
+      select(CacheEvent.id, CacheEvent.cache, CacheEvent.key, CacheEvent.created_at)
+      .where(
+        or_(CacheEvent.id > self._last_id, CacheEvent.created_at >= since),
+        CacheEvent.origin != self._origin,
+      )
+      .order_by(CacheEvent.id)
+    )
+    rows = [row for row in result.all() if row.id not in self._applied]
+    if rows:
+      self._apply(rows)
+      for row in rows:
+        self._applied[row.id] = row.created_at
+      self._last_id = max(self._last_id, rows[-1].id)
+      self._seen_at = max(self._seen_at, max(row.created_at for row in rows))
+    since = self._seen_at - timedelta(seconds=REORDER_WINDOW_SECONDS)
+    self._applied = {event_id: at for event_id, at in self._applied.items() if at >= since}
+
+  def _apply(self, rows) -> None:
+    keys: dict[str, set[Hashable] | None] = {}
+    for row in rows:
+      if row.cache not in self._caches:
+        continue
+      if row.key is None:
+        keys[row.cache] = None
+      elif keys.setdefault(row.cache, set()) is not None:
+        keys[row.cache].add(json.loads(row.key))
+    for name, cache_keys in keys.items():
+      self._caches[name].drop(None if cache_keys is None else tuple(cache_keys))
+    CACHE_BUS_EVENTS.inc(len(rows), direction='applied')
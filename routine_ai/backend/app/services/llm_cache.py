@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..dialects import upsert_insert
+from ..metrics import counter
+from ..models.llm_cache import LLMCacheEntry
+from .lru_cache import TTLCache
+
+LLM_CACHE_HITS = counter('llm_cache_hits_total', 'LLM 응답 캐시 적중 수', ('tier',))
+LLM_CACHE_MISSES = counter('llm_cache_misses_total', 'LLM 응답 캐시 미스 수')
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class LLMResponseCache:
+  """프롬프트+모델 키 기반 LLM 응답 캐시.
+
+  1차는 프로세스 내 LRU(TTL), 2차는 ``persist`` 가 켜진 경우 DB ``llm_cache`` 테이블이다.
+  값은 JSON 직렬화 가능한 객체여야 한다. TTL이 지난 DB 행은 ``set`` 하는 김에 주기적으로 지운다.
+  """
+
+  def __init__(self, maxsize: int, ttl_seconds: float, persist: bool = False) -> None:
+    self._memory: TTLCache[str, Any] = TTLCache(maxsize, ttl_seconds)
+    self._ttl = ttl_seconds
+    self._persist = persist
+    self._pruned_at = 0.0
+
+  @staticmethod
+  def key_for(model: str, prompt: str) -> str:
+    normalized = ' '.join(prompt.split())
+    return hashlib.sha256(f'{model}\n{normalized}'.encode('utf-8')).hexdigest()
+
+  async def get(self, session: AsyncSession, key: str) -> Any | None:
+    value = self._memory.get(key)
+    if value is not None:
+      LLM_CACHE_HITS.inc(tier='memory')
+      return value
+    if self._persist:
+      entry = await session.get(LLMCacheEntry, key)
+      if entry is not None and datetime.utcnow() - entry.created_at <= timedelta(seconds=self._ttl):
+        value = json.loads(entry.response_json)
+        self._memory.set(key, value)
+        LLM_CACHE_HITS.inc(tier='db')
+        return value
+    LLM_CACHE_MISSES.inc()
+    return None
+
+  async def set(self, session: AsyncSession, key: str, model: str, value: Any) -> None:
+    self._memory.set(key, value)
+    if not self._persist:
+      return
+    now = datetime.utcnow()
+    values = {
+      'model': model,
+      'response_json': json.dumps(value, ensure_ascii=False),
+      'created_at': now,
+    }
+    statement = upsert_insert(session, LLMCacheEntry).values(key=key, **values)
+    await session.execute(statement.on_conflict_do_update(index_elements=['key'], set_=values))
+    if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+      await session.execute(delete(LLMCacheEntry).where(LLMCacheEntry.created_at < now - timedelta(seconds=self._ttl)))
+      self._pruned_at = time.monotonic()
+    await session.commit()
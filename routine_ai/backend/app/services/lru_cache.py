@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+
+class TTLCache(Generic[K, V]):
+  """크기 제한 LRU 캐시. ``ttl_seconds`` 가 있으면 만료된 항목은 조회 시 제거된다."""
+
+  def __init__(self, maxsize: int, ttl_seconds: float | None = None) -> None:
+    self._maxsize = max(maxsize, 0)
+    self._ttl = ttl_seconds
+    self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+  def get(self, key: K) -> V | None:
+    item = self._items.get(key)
+    if item is None:
+      return None
+    stored_at, value = item
+    if self._ttl is not None and time.monotonic() - stored_at > self._ttl:
+      del self._items[key]
+      return None
+    self._items.move_to_end(key)
+    return value
+
+  def set(self, key: K, value: V) -> None:
+    if self._maxsize == 0:
+      return
+    self._items[key] = (time.monotonic(), value)
+    self._items.move_to_end(key)
+    while len(self._items) > self._maxsize:
+      self._items.popitem(last=False)
+
+  def pop(self, key: K) -> None:
+    self._items.pop(key, None)
+
+  def clear(self) -> None:
+    self._items.clear()
+
+  def __len__(self) -> int:
+    return len(self._items)
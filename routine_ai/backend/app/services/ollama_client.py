@@ -1,38 +1,165 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import re
-from typing import Any
+import time
+from typing import Any, AsyncIterator
 
 import httpx
 
+from ..metrics import counter, histogram
+from .admission import AdmissionController, AdmissionRejected
+from .single_flight import SingleFlight
+
+OLLAMA_REQUEST_SECONDS = histogram(
+  'ollama_request_duration_seconds',
+  'Ollama 생성 호출 시간 (대기열 대기 포함, 스트림은 마지막 토큰까지)',
+  ('mode', 'outcome'),
+)
+OLLAMA_TOKENS = counter('ollama_tokens_total', 'Ollama가 보고한 토큰 수', ('mode', 'kind'))
+OLLAMA_FAILURES = counter('ollama_failures_total', 'Ollama 호출 실패 수', ('mode', 'reason'))
+
 
 class OllamaException(RuntimeError):
   """Raised when Ollama interaction fails."""
 
 
+class OllamaBusyException(OllamaException):
+  """Raised when a generation could not get an admission slot in time."""
+
+
 class OllamaClient:
-  """간단한 Ollama HTTP 클라이언트."""
+  """간단한 Ollama HTTP 클라이언트.
+
+  커넥션 풀을 가진 ``httpx.AsyncClient`` 하나를 프로세스 수명 동안 재사용한다. ``start``/``aclose`` 는
+  애플리케이션 lifespan에서 호출하며, 시작 전에 호출되면 첫 요청 시 풀을 연다.
+  """
 
-  def __init__(self, base_url: str, model: str, timeout_seconds: float = 15.0) -> None:
+  def __init__(
+    self,
+    base_url: str,
+    model: str,
+    timeout_seconds: float = 15.0,
+    *,
+    max_connections: int = 20,
+    max_keepalive_connections: int = 10,
+    keepalive_expiry: float = 60.0,
+    max_in_flight: int = 4,
+    max_queue: int = 32,
+    queue_timeout_seconds: float = 5.0,
+    transport: httpx.AsyncBaseTransport | None = None,
+  ) -> None:
     self._base_url = base_url.rstrip('/')
     self._model = model
     self._timeout = httpx.Timeout(timeout_seconds, read=timeout_seconds, connect=10.0)
+    self._limits = httpx.Limits(
+      max_connections=max_connections,
+      max_keepalive_connections=max_keepalive_connections,
+      keepalive_expiry=keepalive_expiry,
+    )
+    self._transport = transport
+    self._client: httpx.AsyncClient | None = None
+    self._flights: SingleFlight[str] = SingleFlight('ollama_generate')
+    self._admission = AdmissionController('ollama', max_in_flight, max_queue, queue_timeout_seconds)
+
+  @property
+  def model(self) -> str:
+    return self._model
+
+  async def start(self) -> None:
+    if self._client is None:
+      self._client = httpx.AsyncClient(
+        base_url=self._base_url,
+        timeout=self._timeout,
+        limits=self._limits,
+        transport=self._transport,
+      )
+
+  async def aclose(self) -> None:
+    if self._client is not None:
+      await self._client.aclose()
+      self._client = None
+
+  async def _http(self) -> httpx.AsyncClient:
+    if self._client is None:
+      await self.start()
+    return self._client
 
   async def generate(self, prompt: str) -> str:
+    """프롬프트 응답을 생성한다. 같은 프롬프트의 동시 호출은 한 번의 생성으로 합쳐진다."""
+
+    return await self._flights.do(prompt, lambda: self._generate(prompt))
+
+  async def _generate(self, prompt: str) -> str:
     payload = {'model': self._model, 'prompt': prompt, 'stream': False}
+    client = await self._http()
+    call = _CallMetrics('generate')
     try:
-      async with httpx.AsyncClient(timeout=self._timeout) as client:
-        response = await client.post(f'{self._base_url}/api/generate', json=payload)
-      response.raise_for_status()
+      try:
+        async with self._admission.slot():
+          response = await client.post('/api/generate', json=payload)
+        response.raise_for_status()
+      except AdmissionRejected as error:
+        call.fail('busy')
+        raise OllamaBusyException(f'Ollama 대기열 초과: {error.reason}') from error
+      except httpx.HTTPError as error:
+        call.fail('http')
+        raise OllamaException(f'Ollama 요청 실패: {error}') from error
+
+      data = response.json()
+      call.count_tokens(data)
+      text = data.get('response')
+      if not isinstance(text, str) or not text.strip():
+        call.fail('empty')
+        raise OllamaException('Ollama 응답에 텍스트가 없습니다.')
+      call.outcome = 'ok'
+      return text.strip()
+    finally:
+      call.finish()
+
+  async def generate_stream(self, prompt: str) -> AsyncIterator[str]:
+    """Ollama NDJSON 스트림을 읽어 토큰 조각을 순서대로 내보낸다."""
+
+    payload = {'model': self._model, 'prompt': prompt, 'stream': True}
+    client = await self._http()
+    call = _CallMetrics('stream')
+    try:
+      async with self._admission.slot(), client.stream('POST', '/api/generate', json=payload) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+          if not line.strip():
+            continue
+          try:
+            chunk = json.loads(line)
+          except json.JSONDecodeError as error:
+            call.fail('parse')
+            raise OllamaException(f'Ollama 스트림 파싱 실패: {error}') from error
+          if chunk.get('error'):
+            call.fail('upstream')
+            raise OllamaException(f'Ollama 스트림 오류: {chunk["error"]}')
+          token = chunk.get('response')
+          if isinstance(token, str) and token:
+            yield token
+          if chunk.get('done'):
+            call.count_tokens(chunk)
+            call.outcome = 'ok'
+            return
+        # done 없이 연결이 닫히면 응답이 잘린 것이다. 호출자가 대체 응답을 보낼 수 있게 실패로 올린다.
+        call.fail('truncated')
+        raise OllamaException('Ollama 스트림이 완료 표시 없이 끝났습니다.')
+    except AdmissionRejected as error:
+      call.fail('busy')
+      raise OllamaBusyException(f'Ollama 대기열 초과: {error.reason}') from error
     except httpx.HTTPError as error:
+      call.fail('http')
       raise OllamaException(f'Ollama 요청 실패: {error}') from error
-
-    data = response.json()
-    text = data.get('response')
-    if not isinstance(text, str) or not text.strip():
-      raise OllamaException('Ollama 응답에 텍스트가 없습니다.')
-    return text.strip()
+    except (GeneratorExit, asyncio.CancelledError):
+      # 클라이언트가 스트림을 끊은 경우. 실패로 세지 않는다.
+      call.outcome = 'cancelled'
+      raise
+    finally:
+      call.finish()
 
   @staticmethod
   def extract_json_block(text: str) -> Any:
@@ -52,3 +179,25 @@ class OllamaClient:
       return json.loads(cleaned)
     except json.JSONDecodeError as error:
       raise OllamaException(f'JSON 파싱 실패: {error}') from error
+
+
+class _CallMetrics:
+  """Ollama 호출 한 건의 소요 시간/토큰/실패 사유를 기록한다."""
+
+  def __init__(self, mode: str) -> None:
+    self.mode = mode
+    self.outcome = 'error'
+    self._began = time.perf_counter()
+
+  def fail(self, reason: str) -> None:
+    self.outcome = 'busy' if reason == 'busy' else 'error'
+    OLLAMA_FAILURES.inc(mode=self.mode, reason=reason)
+
+  def count_tokens(self, data: dict) -> None:
+    for field, kind in (('prompt_eval_count', 'prompt'), ('eval_count', 'completion')):
+      value = data.get(field)
+      if isinstance(value, int) and value > 0:
+        OLLAMA_TOKENS.inc(value, mode=self.mode, kind=kind)
+
+  def finish(self) -> None:
+    OLLAMA_REQUEST_SECONDS.observe(time.perf_counter() - self._began, mode=self.mode, outcome=self.outcome)
@@ -0,0 +1,160 @@
+"""펫 레벨 곡선.
+
+``total_xp`` (누적 XP)가 기준 값이고 ``level``/``xp``/``next_level_threshold`` 는 곡선에서 닫힌 형태로
+계산한 파생 값이다. 곡선은 레벨별 필요 XP 표(``PET_XP_TABLE``) 뒤에 ``base + step * n`` 선형 구간이
+이어지는 형태로, 표가 비어 있으면 기존 규칙(100에서 시작해 레벨마다 50씩 증가)과 같다.
+"""
+
+from __future__ import annotations
+
+import math
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from ..config import settings
+from ..models.pet_state import MAX_TOTAL_XP, PetState
+
+
+@dataclass(frozen=True)
+class Progress:
+  level: int
+  xp: int
+  next_level_threshold: int
+
+
+@dataclass(frozen=True)
+class XPCurve:
+  """레벨 n에서 n+1로 가는 데 필요한 XP 곡선."""
+
+  base: int = 100
+  step: int = 50
+  table: tuple[int, ...] = ()
+  # _cumulative[i]: 레벨 i+1에 도달하는 데 필요한 누적 XP (표 구간만).
+  _cumulative: tuple[int, ...] = field(init=False, repr=False, compare=False)
+
+  def __post_init__(self) -> None:
+    if self.base < 1 or self.step < 0 or any(value < 1 for value in self.table):
+      raise ValueError('XP curve needs base >= 1, step >= 0 and positive table entries')
+    cumulative = [0]
+    for value in self.table:
+      cumulative.append(cumulative[-1] + value)
+    object.__setattr__(self, '_cumulative', tuple(cumulative))
+
+  def threshold(self, level: int) -> int:
+    """``level`` 에서 다음 레벨로 가는 데 필요한 XP."""
+
+    if level <= len(self.table):
+      return self.table[level - 1]
+    return self._tail_base + self.step * (level - 1 - len(self.table))
+
+  def xp_before(self, level: int) -> int:
+    """``level`` 에 도달하는 데 필요한 누적 XP."""
+
+    if level <= len(self._cumulative):
+      return self._cumulative[level - 1]
+    n = level - len(self._cumulative)
+    return self._cumulative[-1] + n * self._tail_base + self.step * n * (n - 1) // 2
+
+  def progress(self, total_xp: int) -> Progress:
+    """누적 XP를 (레벨, 현재 레벨 내 XP, 다음 레벨 필요 XP)로 바꾼다. 레벨 수와 무관하게 O(log n)."""
+
+    total_xp = max(total_xp, 0)
+    if total_xp < self._cumulative[-1]:
+      level = bisect_right(self._cumulative, total_xp)
+    else:
+      level = len(self._cumulative) + self._tail_levels(total_xp - self._cumulative[-1])
+    return Progress(level=level, xp=total_xp - self.xp_before(level), next_level_threshold=self.threshold(level))
+
+  @property
+  def _tail_base(self) -> int:
+    return self.table[-1] + self.step if self.table else self.base
+
+  def _tail_levels(self, remaining: int) -> int:
+    # base*n + step*n(n-1)/2 <= remaining 를 만족하는 최대 n. 정수 제곱근 뒤 경계를 보정한다.
+    base = self._tail_base
+    if self.step == 0:
+      return remaining // base
+    b = 2 * base - self.step
+    n = (math.isqrt(b * b + 8 * self.step * remaining) - b) // (2 * self.step)
+    while n > 0 and n * base + self.step * n * (n - 1) // 2 > remaining:
+      n -= 1
+    while (n + 1) * base + self.step * (n + 1) * n // 2 <= remaining:
+      n += 1
+    return n
+
+
+@lru_cache
+def current_curve() -> XPCurve:
+  table = tuple(int(value) for value in settings.pet_xp_table.split(',') if value.strip())
+  return XPCurve(base=settings.pet_xp_base, step=settings.pet_xp_step, table=table)
+
+
+def apply_total_xp(pet: PetState, total_xp: int, curve: XPCurve | None = None) -> bool:
+  """누적 XP를 설정하고 파생 필드를 다시 계산한다. 레벨이 올랐으면 True.
+
+  ``MAX_TOTAL_XP`` 를 넘는 값은 컬럼에 담을 수 없으므로 그 값에서 멈춘다.
+  """
+
+  total_xp = min(max(total_xp, 0), MAX_TOTAL_XP)
+  progress = (curve or current_curve()).progress(total_xp)
+  leveled_up = progress.level > (pet.level or 1)
+  pet.total_xp = total_xp
+  pet.level = progress.level
+  pet.xp = progress.xp
+  pet.next_level_threshold = progress.next_level_threshold
+  return leveled_up
+
+
+def award_xp(pet: PetState, xp_gain: int, curve: XPCurve | None = None) -> bool:
+  return apply_total_xp(pet, (pet.total_xp or 0) + xp_gain, curve)
+
+
+async def recompute_pets(conn: AsyncConnection, curve: XPCurve | None = None, batch_size: int = 500) -> int:
+  """모든 펫의 레벨 필드를 ``total_xp`` 와 현재 곡선으로 다시 계산한다. 곡선을 바꾼 뒤 실행한다."""
+
+  curve = curve or current_curve()
+  table = PetState.__table__
+  # Core UPDATE는 ORM 버전 검사를 거치지 않으므로 version을 직접 올린다.
+  statement = (
+    update(table)
+    .where(table.c.user_id == bindparam('uid'))
+    .values(
+      level=bindparam('level'),
+      xp=bindparam('xp'),
+      next_level_threshold=bindparam('threshold'),
+      version=table.c.version + 1,
+    )
+  )
+  pets = 0
+  pending: list[dict] = []
+  rows = await conn.stream(select(table.c.user_id, table.c.total_xp))
+  async for user_id, total_xp in rows:
+    pets += 1
+    progress = curve.progress(total_xp or 0)
+    pending.append(
+      {'uid': user_id, 'level': progress.level, 'xp': progress.xp, 'threshold': progress.next_level_threshold}
+    )
+    if len(pending) >= batch_size:
+      await conn.execute(statement, pending)
+      pending = []
+  if pending:
+    await conn.execute(statement, pending)
+  return pets
+
+
+async def backfill_total_xp(conn: AsyncConnection, curve: XPCurve | None = None) -> int:
+  """``total_xp`` 컬럼 도입 전 행을 (level, xp)에서 채운다."""
+
+  curve = curve or current_curve()
+  table = PetState.__table__
+  rows = (await conn.execute(select(table.c.user_id, table.c.level, table.c.xp))).all()
+  if rows:
+    await conn.execute(
+      update(table).where(table.c.user_id == bindparam('uid')).values(total_xp=bindparam('total')),
+      [{'uid': user_id, 'total': curve.xp_before(max(level or 1, 1)) + (xp or 0)} for user_id, level, xp in rows],
+    )
+  return len(rows)
@@ -1,36 +1,56 @@
 from __future__ import annotations
 
-from sqlalchemy import select
+from typing import Iterable
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..dialects import upsert_insert
 from ..models.pet_state import PetState
 from ..models.user import User
+from .pet_progression import apply_total_xp
+
+
+def default_pet_state(user_id: int) -> PetState:
+  """아직 행이 없는 사용자의 초기 펫 상태. 세션에 추가하지 않는다."""
+
+  pet = PetState(user_id=user_id, streak=0)
+  apply_total_xp(pet, 0)
+  return pet
+
+
+async def ensure_users(session: AsyncSession, user_ids: Iterable[int]) -> None:
+  """``users`` 행이 없으면 만든다. 다른 테이블의 ``user_id`` FK를 쓰기 전에 부른다.
+
+  ``ON CONFLICT DO NOTHING`` 이라 동시 요청이 같은 사용자를 만들어도 충돌 없이 한쪽만 들어간다.
+  """
+
+  rows = [{'id': user_id} for user_id in sorted(set(user_ids))]
+  if rows:
+    await session.execute(upsert_insert(session, User).values(rows).on_conflict_do_nothing(index_elements=['id']))
+
 
+async def load_pet_state(session: AsyncSession, user_id: int) -> PetState:
+  """읽기 전용 조회. 행이 없으면 기본 상태를 돌려주고 아무것도 쓰지 않는다.
+
+  행 생성은 완료 기록이나 관리자 수정 같은 실제 쓰기에서 ``get_or_create_pet_state`` 가 맡는다.
+  """
 
-async def get_or_create_pet_state(session: AsyncSession, user_id: int) -> PetState:
   pet = await session.get(PetState, user_id)
+  return pet if pet is not None else default_pet_state(user_id)
+
+
+async def get_or_create_pet_state(session: AsyncSession, user_id: int, *, for_update: bool = False) -> PetState:
+  """``for_update`` 면 ``SELECT ... FOR UPDATE`` 로 읽어 PostgreSQL에서 같은 펫의 쓰기를 줄 세운다.
+
+  SQLite는 FOR UPDATE를 무시하지만 쓰기 트랜잭션이 이미 DB 전체를 잠그고 있어 결과는 같다.
+  """
+
+  pet = await session.get(PetState, user_id, with_for_update=for_update or None)
   if pet is not None:
     return pet
 
-  user = await session.get(User, user_id)
-  if user is None:
-    user = User(id=user_id)
-    session.add(user)
-    await session.flush()
-
-  pet = PetState(user_id=user_id, level=1, xp=0, next_level_threshold=100)
+  await ensure_users(session, [user_id])
+  pet = default_pet_state(user_id)
   session.add(pet)
   await session.flush()
   return pet
-
-
-async def ensure_default_user(session: AsyncSession, user_id: int = 1) -> None:
-  result = await session.execute(select(User).where(User.id == user_id))
-  user = result.scalars().first()
-  if user is None:
-    session.add(User(id=user_id))
-    await session.flush()
-  pet = await session.get(PetState, user_id)
-  if pet is None:
-    session.add(PetState(user_id=user_id, level=1, xp=0, next_level_threshold=100))
-    await session.flush()
@@ -1,22 +1,147 @@
 from __future__ import annotations
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Sequence
 
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from ..models.pet_state import PetState
 from ..models.routine_log import RoutineLog
 
 
-async def calculate_streak(session: AsyncSession, user_id: int, limit: int = 30) -> int:
+async def calculate_streak(session: AsyncSession, user_id: int) -> int:
+  pet = await session.get(PetState, user_id)
+  return pet.streak if pet is not None else 0
+
+
+async def update_streak(session: AsyncSession, pet: PetState, status: str, ended_ts: datetime | None) -> int:
+  """새 로그 한 건을 반영해 저장된 streak를 갱신한다."""
+
+  return await apply_logs_to_streak(session, pet, [(status, ended_ts)])
+
+
+async def apply_logs_to_streak(
+  session: AsyncSession,
+  pet: PetState,
+  entries: Sequence[tuple[str, datetime | None]],
+) -> int:
+  """이미 flush된 로그들을 반영해 저장된 streak를 갱신한다.
+
+  streak는 ``ended_ts`` 기준 마지막 done 이외 로그 이후의 done 수다. 순서대로 들어온 로그는
+  O(1)로 처리하고, 현재 끊김 시점보다 뒤의 done 이외 로그가 있으면 그중 가장 최근 것을 기준으로
+  인덱스 범위 COUNT를 한 번만 실행한다.
+  """
+
+  broken_at = pet.streak_broken_at
+  fresh = [
+    (status, ended_ts)
+    for status, ended_ts in entries
+    if ended_ts is not None and (broken_at is None or ended_ts > broken_at)
+  ]
+  breaks = [ended_ts for status, ended_ts in fresh if status != 'done']
+  if not breaks:
+    pet.streak += len(fresh)
+    return pet.streak
+
+  pet.streak_broken_at = max(breaks)
   result = await session.execute(
-    select(RoutineLog.status)
-    .where(RoutineLog.user_id == user_id)
-    .order_by(RoutineLog.ended_at.desc())
-    .limit(limit)
+    select(func.count())
+    .select_from(RoutineLog)
+    .where(
+      RoutineLog.user_id == pet.user_id,
+      RoutineLog.ended_ts > pet.streak_broken_at,
+      RoutineLog.status == 'done',
+    )
   )
+  pet.streak = int(result.scalar_one())
+  return pet.streak
+
+
+async def streak_history(session: AsyncSession, user_id: int, checkpoints: Sequence[datetime]) -> list[int]:
+  """오름차순 시점 목록 각각의 직전까지(``ended_ts`` < 시점) streak 값을 계산한다.
+
+  첫 시점 이전 상태는 인덱스 조회 두 번으로 구하고, 이후는 구간 안의 로그를 한 번 훑는다.
+  """
+
+  if not checkpoints:
+    return []
+  first = checkpoints[0]
+  broken_at = (
+    await session.execute(
+      select(func.max(RoutineLog.ended_ts)).where(
+        RoutineLog.user_id == user_id,
+        RoutineLog.ended_ts < first,
+        RoutineLog.status != 'done',
+      )
+    )
+  ).scalar()
+  window = [RoutineLog.user_id == user_id, RoutineLog.ended_ts < first, RoutineLog.status == 'done']
+  if broken_at is not None:
+    window.append(RoutineLog.ended_ts > broken_at)
+  streak = int((await session.execute(select(func.count()).select_from(RoutineLog).where(*window))).scalar_one())
+
+  result = await session.execute(
+    select(RoutineLog.status, RoutineLog.ended_ts)
+    .where(RoutineLog.user_id == user_id, RoutineLog.ended_ts >= first, RoutineLog.ended_ts < checkpoints[-1])
+    .order_by(RoutineLog.ended_ts)
+  )
+  history: list[int] = [streak]
+  index = 1
+  for status, ended_ts in result.all():
+    while index < len(checkpoints) and ended_ts >= checkpoints[index]:
+      history.append(streak)
+      index += 1
+    if broken_at is not None and ended_ts <= broken_at:
+      continue
+    if status == 'done':
+      streak += 1
+    else:
+      streak, broken_at = 0, ended_ts
+  history.extend([streak] * (len(checkpoints) - len(history)))
+  return history
+
+
+async def rebuild_streaks(conn: AsyncConnection, batch_size: int = 500) -> int:
+  """``routine_logs`` 를 (user_id, ended_ts) 순서로 한 번 스트리밍해 전체 streak를 재계산한다."""
+
+  table = PetState.__table__
+  # Core UPDATE는 ORM 버전 검사를 거치지 않으므로 version을 직접 올려 진행 중인 요청이 충돌을 감지하게 한다.
+  await conn.execute(update(table).values(streak=0, streak_broken_at=None, version=table.c.version + 1))
+  statement = (
+    update(table)
+    .where(table.c.user_id == bindparam('uid'))
+    .values(streak=bindparam('value'), streak_broken_at=bindparam('broken_at'), version=table.c.version + 1)
+  )
+
+  pending: list[dict] = []
+  users = 0
+  current_user: int | None = None
   streak = 0
-  for status in result.scalars():
+  broken_at: datetime | None = None
+  rows = await conn.stream(
+    select(RoutineLog.user_id, RoutineLog.status, RoutineLog.ended_ts)
+    .where(RoutineLog.ended_ts.is_not(None))
+    .order_by(RoutineLog.user_id, RoutineLog.ended_ts)
+  )
+  async for user_id, status, ended_ts in rows:
+    if user_id != current_user:
+      if current_user is not None:
+        pending.append({'uid': current_user, 'value': streak, 'broken_at': broken_at})
+      current_user, streak, broken_at = user_id, 0, None
+    if broken_at is not None and ended_ts <= broken_at:
+      continue
     if status == 'done':
       streak += 1
     else:
-      break
-  return streak
+      streak, broken_at = 0, ended_ts
+    if len(pending) >= batch_size:
+      await conn.execute(statement, pending)
+      users += len(pending)
+      pending = []
+  if current_user is not None:
+    pending.append({'uid': current_user, 'value': streak, 'broken_at': broken_at})
+  if pending:
+    await conn.execute(statement, pending)
+    users += len(pending)
+  return users
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from fastapi import Request, Response, status
+from pydantic import TypeAdapter
+
+from ..metrics import counter
+from .lru_cache import TTLCache
+
+READ_CACHE_HITS = counter('read_cache_hits_total', '읽기 응답 캐시 적중 수', ('cache',))
+READ_CACHE_MISSES = counter('read_cache_misses_total', '읽기 응답 캐시 미스 수', ('cache',))
+READ_CACHE_NOT_MODIFIED = counter('read_cache_not_modified_total', 'If-None-Match 일치로 304를 돌려준 수', ('cache',))
+
+
+@dataclass(frozen=True)
+class CachedBody:
+  body: bytes
+  etag: str
+
+
+class ReadCache:
+  """직렬화된 읽기 응답(JSON 본문 + ETag)을 보관하는 프로세스 내 LRU 캐시.
+
+  조회 전에 ``epoch()`` 를 받아 두고 ``put`` 에 넘기면, 그 사이 무효화가 있었던 경우 오래된 값을
+  다시 넣지 않는다. 쓰기 경로는 커밋한 뒤에 ``invalidate`` 를 호출한다.
+
+  멀티 워커에서는 ``subscribe`` 로 등록한 리스너(``CacheBus``)가 무효화를 다른 워커로 전하고,
+  다른 워커에서 온 무효화는 ``drop`` 으로 반영한다. 키는 JSON 스칼라(사용자 id 등)여야 한다.
+  """
+
+  def __init__(self, name: str, adapter: TypeAdapter, maxsize: int, ttl_seconds: float | None = None) -> None:
+    self._name = name
+    self._adapter = adapter
+    self._items: TTLCache[Hashable, CachedBody] = TTLCache(maxsize, ttl_seconds)
+    self._epoch = 0
+    self._listeners: list[Callable[[str, tuple[Hashable, ...] | None], None]] = []
+
+  @property
+  def name(self) -> str:
+    return self._name
+
+  def subscribe(self, listener: Callable[[str, tuple[Hashable, ...] | None], None]) -> None:
+    """로컬 무효화마다 ``listener(name, keys)`` 를 부른다. 전체 비우기는 ``keys=None`` 이다."""
+
+    self._listeners.append(listener)
+
+  def get(self, key: Hashable) -> CachedBody | None:
+    entry = self._items.get(key)
+    if entry is None:
+      READ_CACHE_MISSES.inc(cache=self._name)
+    else:
+      READ_CACHE_HITS.inc(cache=self._name)
+    return entry
+
+  def epoch(self) -> int:
+    return self._epoch
+
+  def put(self, key: Hashable, value: Any, epoch: int) -> CachedBody:
+    body = self._adapter.dump_json(value)
+    entry = CachedBody(body=body, etag=f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"')
+    if epoch == self._epoch:
+      self._items.set(key, entry)
+    return entry
+
+  def invalidate(self, *keys: Hashable) -> None:
+    self.drop(keys)
+    self._notify(keys)
+
+  def clear(self) -> None:
+    self.drop(None)
+    self._notify(None)
+
+  def drop(self, keys: tuple[Hashable, ...] | None) -> None:
+    """리스너에 알리지 않고 무효화한다. ``None`` 이면 전부 비운다."""
+
+    self._epoch += 1
+    if keys is None:
+      self._items.clear()
+      return
+    for key in keys:
+      self._items.pop(key)
+
+  def _notify(self, keys: tuple[Hashable, ...] | None) -> None:
+    for listener in self._listeners:
+      listener(self._name, keys)
+
+  def respond(self, request: Request, entry: CachedBody) -> Response:
+    """``If-None-Match`` 가 현재 ETag와 같으면 본문 없이 304, 아니면 캐시된 본문을 그대로 보낸다."""
+
+    headers = {'ETag': entry.etag, 'Cache-Control': 'no-cache'}
+    if _etag_matches(request.headers.get('if-none-match'), entry.etag):
+      READ_CACHE_NOT_MODIFIED.inc(cache=self._name)
+      return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=entry.body, media_type='application/json', headers=headers)
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+  if not header:
+    return False
+  for candidate in header.split(','):
+    candidate = candidate.strip()
+    if candidate == '*' or candidate.removeprefix('W/') == etag:
+      return True
+  return False
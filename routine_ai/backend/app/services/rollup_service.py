@@ -0,0 +1,244 @@
+"""일별 집계(daily_rollups) 유지와 과거 로그 백필.
+
+``complete_routine`` 계열 쓰기 경로는 새 로그를 즉시 집계에 더한다. 집계 테이블이 생기기 전에 쌓인
+로그(id <= 워터마크)는 lifespan에서 시작되는 백그라운드 집계기가 id 순서로 나눠 채운다. 백필이 끝나기
+전에는 ``rollups_ready`` 가 False이므로 ``daily_summaries`` 가 원본 로그를 읽어 같은 형태로 집계한다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Iterable
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from ..dialects import upsert_insert
+from ..models.app_state import AppState
+from ..models.daily_rollup import DailyRollup
+from ..models.routine_log import RoutineLog
+
+logger = logging.getLogger(__name__)
+
+STATUS_COLUMNS = ('done', 'partial', 'late', 'miss')
+COUNT_COLUMNS = STATUS_COLUMNS + ('other',)
+WATERMARK_KEY = 'rollup_backfill_watermark'
+CURSOR_KEY = 'rollup_backfill_cursor'
+
+_ready = False
+
+
+def slot_label(value: datetime) -> str:
+  hour = value.hour
+  if 5 <= hour < 11:
+    return '아침'
+  if 11 <= hour < 14:
+    return '점심'
+  if 14 <= hour < 18:
+    return '오후'
+  if 18 <= hour < 22:
+    return '저녁'
+  return '밤'
+
+
+def _status_column(status: str) -> str:
+  return status if status in STATUS_COLUMNS else 'other'
+
+
+@dataclass
+class RollupSummary:
+  """기간 내 집계 합계와 시간대별 done 수."""
+
+  counts: Counter = field(default_factory=Counter)
+  done_by_slot: Counter = field(default_factory=Counter)
+
+  @property
+  def total(self) -> int:
+    return sum(self.counts[column] for column in COUNT_COLUMNS)
+
+  @property
+  def done(self) -> int:
+    return self.counts['done']
+
+  @property
+  def completion(self) -> float:
+    # done은 1, partial/late는 0.5로 계산한다.
+    total = self.total
+    if not total:
+      return 0.0
+    return (self.counts['done'] + (self.counts['partial'] + self.counts['late']) * 0.5) / total
+
+  def add(self, other: 'RollupSummary') -> None:
+    self.counts.update(other.counts)
+    self.done_by_slot.update(other.done_by_slot)
+
+  def add_log(self, status: str, started_ts: datetime) -> None:
+    self.counts[_status_column(status)] += 1
+    if status == 'done':
+      self.done_by_slot[slot_label(started_ts)] += 1
+
+  def best_slots(self, limit: int = 3) -> list[str]:
+    ranked = sorted((item for item in self.done_by_slot.items() if item[1] > 0), key=lambda item: item[1], reverse=True)
+    return [label for label, _ in ranked][:limit]
+
+
+def _increments(logs: Iterable[tuple[int, str, datetime | None]]) -> list[dict]:
+  buckets: dict[tuple[int, date, str], Counter] = {}
+  for user_id, status, started_ts in logs:
+    if started_ts is None:
+      continue
+    key = (user_id, started_ts.date(), slot_label(started_ts))
+    buckets.setdefault(key, Counter())[_status_column(status)] += 1
+  return [
+    {'user_id': user_id, 'day': day, 'slot': slot, **{column: counts[column] for column in COUNT_COLUMNS}}
+    for (user_id, day, slot), counts in buckets.items()
+  ]
+
+
+async def _apply_increments(executor: AsyncSession | AsyncConnection, rows: list[dict]) -> None:
+  if not rows:
+    return
+  statement = upsert_insert(executor, DailyRollup)
+  statement = statement.on_conflict_do_update(
+    index_elements=['user_id', 'day', 'slot'],
+    set_={column: getattr(DailyRollup, column) + statement.excluded[column] for column in COUNT_COLUMNS},
+  )
+  await executor.execute(statement, rows)
+
+
+async def increment_rollups(session: AsyncSession, logs: Iterable[RoutineLog]) -> None:
+  """새로 기록된 로그를 호출자 트랜잭션 안에서 일별 집계에 더한다."""
+
+  await _apply_increments(session, _increments((log.user_id, log.status, log.started_ts) for log in logs))
+
+
+async def summarize_range(session: AsyncSession, user_id: int, start: date, end: date) -> RollupSummary:
+  """[start, end) 기간의 집계를 합친다."""
+
+  summary = RollupSummary()
+  for day_summary in (await daily_summaries(session, user_id, start, end)).values():
+    summary.add(day_summary)
+  return summary
+
+
+async def daily_summaries(session: AsyncSession, user_id: int, start: date, end: date) -> dict[date, RollupSummary]:
+  """[start, end) 기간의 날짜별 집계. 백필이 끝나기 전에는 원본 로그로 같은 형태를 만든다."""
+
+  if await rollups_ready(session):
+    return await _rollup_daily_summaries(session, user_id, start, end)
+  return await _log_daily_summaries(session, user_id, start, end)
+
+
+async def _rollup_daily_summaries(
+  session: AsyncSession, user_id: int, start: date, end: date
+) -> dict[date, RollupSummary]:
+  """집계 테이블을 한 번의 GROUP BY 조회로 읽는다."""
+
+  result = await session.execute(
+    select(
+      DailyRollup.day,
+      DailyRollup.slot,
+      *(func.sum(getattr(DailyRollup, column)) for column in COUNT_COLUMNS),
+    )
+    .where(DailyRollup.user_id == user_id, DailyRollup.day >= start, DailyRollup.day < end)
+    .group_by(DailyRollup.day, DailyRollup.slot)
+  )
+  summaries: dict[date, RollupSummary] = {}
+  for day, slot, *counts in result.all():
+    summary = summaries.setdefault(day, RollupSummary())
+    for column, value in zip(COUNT_COLUMNS, counts):
+      summary.counts[column] += int(value or 0)
+    if counts[0]:
+      summary.done_by_slot[slot] += int(counts[0])
+  return summaries
+
+
+async def _log_daily_summaries(
+  session: AsyncSession, user_id: int, start: date, end: date
+) -> dict[date, RollupSummary]:
+  """원본 로그를 (user_id, started_ts) 인덱스 범위로 한 번 읽어 날짜별로 집계한다."""
+
+  result = await session.execute(
+    select(RoutineLog.status, RoutineLog.started_ts).where(
+      RoutineLog.user_id == user_id,
+      RoutineLog.started_ts >= datetime.combine(start, time.min),
+      RoutineLog.started_ts < datetime.combine(end, time.min),
+    )
+  )
+  summaries: dict[date, RollupSummary] = {}
+  for status, started_ts in result.all():
+    summaries.setdefault(started_ts.date(), RollupSummary()).add_log(status, started_ts)
+  return summaries
+
+
+async def rollups_ready(session: AsyncSession) -> bool:
+  global _ready
+  if _ready:
+    return True
+  watermark = await session.get(AppState, WATERMARK_KEY)
+  cursor = await session.get(AppState, CURSOR_KEY)
+  if watermark is not None and cursor is not None and int(cursor.value) >= int(watermark.value):
+    _ready = True
+  return _ready
+
+
+async def init_rollup_backfill(conn: AsyncConnection) -> None:
+  """처음 한 번, 현재까지의 최대 로그 id를 백필 워터마크로 기록한다."""
+
+  result = await conn.execute(select(AppState.value).where(AppState.key == WATERMARK_KEY))
+  if result.first() is not None:
+    return
+  max_id = (await conn.execute(select(func.max(RoutineLog.id)))).scalar() or 0
+  await conn.execute(
+    upsert_insert(conn, AppState).on_conflict_do_nothing(index_elements=['key']),
+    [{'key': WATERMARK_KEY, 'value': str(max_id)}, {'key': CURSOR_KEY, 'value': '0'}],
+  )
+
+
+async def backfill_rollups(session_factory, batch_size: int = 2000, pause_seconds: float = 0.01) -> None:
+  """워터마크 이하 로그를 id 순서로 집계에 더한다. 배치마다 커밋하므로 중단 후 이어서 진행된다.
+
+  멀티 워커에서는 워커마다 이 루프가 돌므로, 커서를 compare-and-set으로 먼저 옮긴 워커만 그 배치를 더한다.
+  """
+
+  while True:
+    async with session_factory() as session:
+      watermark = int((await session.get(AppState, WATERMARK_KEY)).value)
+      cursor = int((await session.get(AppState, CURSOR_KEY)).value)
+      if cursor >= watermark:
+        break
+      result = await session.execute(
+        select(RoutineLog.id, RoutineLog.user_id, RoutineLog.status, RoutineLog.started_ts)
+        .where(RoutineLog.id > cursor, RoutineLog.id <= watermark)
+        .order_by(RoutineLog.id)
+        .limit(batch_size)
+      )
+      rows = result.all()
+      next_cursor = str(rows[-1].id if rows else watermark)
+      claimed = await session.execute(
+        update(AppState)
+        .where(AppState.key == CURSOR_KEY, AppState.value == str(cursor))
+        .values(value=next_cursor)
+        .execution_options(synchronize_session=False)
+      )
+      if claimed.rowcount != 1:
+        # 다른 워커가 같은 배치를 먼저 가져갔다.
+        await session.rollback()
+        continue
+      await _apply_increments(session, _increments((row.user_id, row.status, row.started_ts) for row in rows))
+      await session.commit()
+      logger.info('rollup backfill: %s/%s', next_cursor, watermark)
+    await asyncio.sleep(pause_seconds)
+
+
+async def run_rollup_aggregator(session_factory) -> None:
+  try:
+    await backfill_rollups(session_factory)
+  except asyncio.CancelledError:
+    raise
+  except Exception:  # pragma: no cover - 백필 실패는 통계를 원본 로그 경로에 남겨둘 뿐이다.
+    logger.exception('rollup backfill failed')
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from ..models.routine_log import RoutineLog
+from ..schemas.routine import RoutineCompleteRequest
+
+
+def parse_log_time(raw: str | None) -> datetime | None:
+  """ISO 문자열을 타임존 정보가 없는 벽시계 시각으로 정규화한다."""
+
+  if not raw:
+    return None
+  try:
+    value = datetime.fromisoformat(raw)
+  except ValueError:
+    return None
+  return value.replace(tzinfo=None)
+
+
+def build_routine_log(payload: RoutineCompleteRequest) -> RoutineLog:
+  return RoutineLog(
+    user_id=payload.user_id,
+    routine_id=payload.routine_id,
+    status=payload.status,
+    started_at=payload.started_at,
+    ended_at=payload.ended_at,
+    note=payload.note,
+    started_ts=parse_log_time(payload.started_at),
+    ended_ts=parse_log_time(payload.ended_at),
+    idempotency_key=payload.idempotency_key,
+  )
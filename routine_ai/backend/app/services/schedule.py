@@ -0,0 +1,160 @@
+"""루틴 일정(요일 비트마스크 + 자정 이후 분) 변환 도우미.
+
+요일 비트는 ``date.weekday()`` 와 같이 월요일이 bit 0, 일요일이 bit 6이다. API는 기존처럼
+``['월', '수', '금']`` 형태의 요일 목록을 주고받지만 기준 값은 ``days_mask`` 이고, 응답의 요일 목록도
+마스크에서 ``WEEKDAY_LABELS`` 순서로 만든다. ``days`` JSON 컬럼은 이전 스키마 호환용으로 입력 그대로 함께 쓴다.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import Select, select
+
+from ..models.routine import Routine
+from ..schemas.routine import RoutineRead
+
+WEEKDAY_LABELS: tuple[str, ...] = ('월', '화', '수', '목', '금', '토', '일')
+ALL_DAYS_MASK = (1 << len(WEEKDAY_LABELS)) - 1
+
+_DAY_NAMES: tuple[tuple[str, ...], ...] = (
+  ('월', '월요일', 'mon', 'monday'),
+  ('화', '화요일', 'tue', 'tues', 'tuesday'),
+  ('수', '수요일', 'wed', 'wednesday'),
+  ('목', '목요일', 'thu', 'thur', 'thurs', 'thursday'),
+  ('금', '금요일', 'fri', 'friday'),
+  ('토', '토요일', 'sat', 'saturday'),
+  ('일', '일요일', 'sun', 'sunday'),
+)
+_DAY_ALIASES: dict[str, int] = {name: 1 << index for index, names in enumerate(_DAY_NAMES) for name in names}
+_DAY_ALIASES.update({'매일': ALL_DAYS_MASK, 'everyday': ALL_DAYS_MASK, '평일': 0b0011111, '주말': 0b1100000})
+
+_TIME_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})')
+_WINDOW_PATTERN = re.compile(r'^\s*(\d+)\s*([mh]?)\s*$')
+MINUTES_PER_DAY = 24 * 60
+
+
+@dataclass(frozen=True)
+class DueRange:
+  """하루 안의 [start_minute, end_minute) 구간."""
+
+  day: date
+  start_minute: int
+  end_minute: int
+
+  @property
+  def weekday_bit(self) -> int:
+    return 1 << self.day.weekday()
+
+
+def days_to_mask(days: list[str]) -> int:
+  """요일 목록을 비트마스크로 바꾼다. 모르는 값은 무시한다(기존 데이터 백필용, 새 입력은 ``set_days`` 가 거른다)."""
+
+  mask = 0
+  for day in days:
+    mask |= _DAY_ALIASES.get(day.strip().lower(), 0)
+  return mask
+
+
+def mask_to_days(mask: int) -> list[str]:
+  """비트마스크를 월요일부터 순서대로 ``WEEKDAY_LABELS`` 요일 목록으로 바꾼다."""
+
+  return [label for index, label in enumerate(WEEKDAY_LABELS) if mask & (1 << index)]
+
+
+def unknown_days(days: list[str]) -> list[str]:
+  return [day for day in days if day.strip().lower() not in _DAY_ALIASES]
+
+
+def time_to_minutes(value: str) -> int | None:
+  """``'07:30'`` 같은 HH:MM 문자열을 자정 이후 분으로 바꾼다. 해석할 수 없으면 None."""
+
+  match = _TIME_PATTERN.match(value or '')
+  if match is None:
+    return None
+  hour, minute = int(match.group(1)), int(match.group(2))
+  if hour > 23 or minute > 59:
+    return None
+  return hour * 60 + minute
+
+
+def dump_days(days: list[str]) -> str:
+  return json.dumps(days, ensure_ascii=False)
+
+
+def load_days(raw: str) -> list[str]:
+  try:
+    data = json.loads(raw)
+    if isinstance(data, list):
+      return [str(item) for item in data]
+  except json.JSONDecodeError:
+    pass
+  return [part.strip() for part in raw.split(',') if part.strip()]
+
+
+def set_days(record: Routine, days: list[str]) -> None:
+  """모르는 요일 값이 있으면 레코드를 건드리지 않고 ``ValueError``."""
+
+  unknown = unknown_days(days)
+  if unknown:
+    raise ValueError(f'unknown days: {unknown}')
+  record.days = dump_days(days)
+  record.days_mask = days_to_mask(days)
+
+
+def set_time(record: Routine, value: str) -> None:
+  record.time = value
+  record.time_minutes = time_to_minutes(value)
+
+
+def routine_to_schema(record: Routine) -> RoutineRead:
+  # 요일은 days_mask 에서 만든다. 별칭('매일', 'mon' 등)으로 저장한 루틴도 같은 표기로 돌려준다.
+  return RoutineRead(
+    id=record.id,
+    user_id=record.user_id,
+    title=record.title,
+    time=record.time,
+    days=mask_to_days(record.days_mask or 0),
+    difficulty=record.difficulty,
+    active=record.active,
+    icon_key=record.icon_key,
+  )
+
+
+def parse_window(value: str) -> int | None:
+  """``'15m'``, ``'2h'``, ``'30'`` 형태의 기간을 분으로 바꾼다."""
+
+  match = _WINDOW_PATTERN.match(value or '')
+  if match is None:
+    return None
+  amount = int(match.group(1))
+  return amount * 60 if match.group(2) == 'h' else amount
+
+
+def due_ranges(at: datetime, window_minutes: int) -> list[DueRange]:
+  """``at`` 부터 ``window_minutes`` 동안의 구간을 날짜별로 나눈다. 자정을 넘으면 두 구간이 된다."""
+
+  start = at.hour * 60 + at.minute
+  end = start + window_minutes
+  if end <= MINUTES_PER_DAY:
+    return [DueRange(at.date(), start, end)]
+  return [
+    DueRange(at.date(), start, MINUTES_PER_DAY),
+    DueRange(at.date() + timedelta(days=1), 0, end - MINUTES_PER_DAY),
+  ]
+
+
+def due_routines_query(due: DueRange) -> Select:
+  return (
+    select(Routine.id, Routine.user_id, Routine.title, Routine.time, Routine.time_minutes)
+    .where(
+      Routine.active.is_(True),
+      Routine.time_minutes >= due.start_minute,
+      Routine.time_minutes < due.end_minute,
+      Routine.days_mask.op('&')(due.weekday_bit) != 0,
+    )
+    .order_by(Routine.time_minutes, Routine.id)
+  )
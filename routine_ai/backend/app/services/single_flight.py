@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from ..metrics import counter
+
+T = TypeVar('T')
+
+SINGLE_FLIGHT_CALLS = counter(
+  'single_flight_calls_total',
+  '단일 실행 그룹 호출 수 (role=leader|follower)',
+  ('flight', 'role'),
+)
+
+
+class SingleFlight(Generic[T]):
+  """같은 키로 동시에 들어온 호출을 하나의 실행으로 합친다.
+
+  첫 호출자가 작업을 태스크로 시작하고, 작업이 끝나기 전에 들어온 같은 키의 호출자는 그 결과(또는 예외)를
+  함께 받는다. 작업은 ``asyncio.shield`` 로 보호되어 한 호출자가 취소되어도 나머지에게 영향을 주지 않는다.
+  """
+
+  def __init__(self, name: str) -> None:
+    self._name = name
+    self._inflight: dict[Hashable, asyncio.Task[T]] = {}
+
+  async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+    task = self._inflight.get(key)
+    if task is None:
+      task = asyncio.ensure_future(fn())
+      self._inflight[key] = task
+      task.add_done_callback(lambda done: self._forget(key, done))
+      SINGLE_FLIGHT_CALLS.inc(flight=self._name, role='leader')
+    else:
+      SINGLE_FLIGHT_CALLS.inc(flight=self._name, role='follower')
+    return await asyncio.shield(task)
+
+  def in_flight(self) -> int:
+    return len(self._inflight)
+
+  def _forget(self, key: Hashable, task: asyncio.Task[T]) -> None:
+    if self._inflight.get(key) is task:
+      del self._inflight[key]
+    if not task.cancelled():
+      # 모든 호출자가 취소된 경우에도 "exception was never retrieved" 경고가 나지 않도록 소비한다.
+      task.exception()
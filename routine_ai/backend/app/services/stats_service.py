@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import delete, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.stats_cache import StatsCache
+from ..models.user import User
+
+
+def week_start_of(value: date) -> date:
+  return value - timedelta(days=value.weekday())
+
+
+async def invalidate_weekly_stats(
+  session: AsyncSession,
+  user_id: int,
+  moments: Iterable[datetime | None],
+) -> None:
+  """로그 변경으로 영향을 받는 주의 통계 캐시를 호출자 트랜잭션 안에서 삭제한다.
+
+  삭제 전에 사용자의 ``stats_version`` 을 올려, 이 변경 전 데이터로 진행 중인 통계 빌드가 지운 캐시를 다시 쓰지 못하게 한다.
+  PostgreSQL에서는 이 UPDATE가 users 행을 잠가 빌드의 캐시 쓰기(FOR SHARE)와 순서가 정해지므로 올리기가 삭제보다 먼저여야 한다.
+  """
+
+  weeks = {week_start_of(moment.date()).isoformat() for moment in moments if moment is not None}
+  if not weeks:
+    return
+  await session.execute(update(User).where(User.id == user_id).values(stats_version=User.stats_version + 1))
+  await session.execute(
+    delete(StatsCache).where(StatsCache.user_id == user_id, StatsCache.week_start.in_(weeks))
+  )
@@ -0,0 +1,159 @@
+"""동시 완료 요청 XP/멱등성 검증.
+
+임시 SQLite DB(또는 ``--db-url`` 로 준 빈 DB)에 앱을 띄우고 ``/api/routine/complete`` 를 수백 건 병렬로 보낸다. 일부 요청은 같은
+``idempotency_key`` 로 여러 번 재전송해 클라이언트 재시도를 흉내 낸다. 끝나면 다음을 확인한다.
+
+- 키마다 ``routine_logs`` 가 정확히 한 행
+- 펫 XP/레벨이 고유 완료 건 XP 합을 레벨 곡선에 넣은 결과와 같음 (유실/중복 가산 없음)
+- streak 이 전체 재계산 결과와 같음
+- ``users`` 행이 없는 새 사용자의 루틴 생성, 첫 완료(동시), 배치 완료가 FK 위반 없이 성공함
+  (SQLite에서도 ``PRAGMA foreign_keys=ON`` 으로 FK를 검사한다)
+
+  cd backend
+  python -m benchmarks.concurrent_complete --requests 400 --retries 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# 마이그레이션이 만드는 기본 사용자(1)와 겹치지 않는, users 행이 없는 사용자 id.
+NEW_USER_ID = 9001
+
+
+async def _main(args: argparse.Namespace) -> int:
+  if args.db_url:
+    os.environ['DB_URL'] = args.db_url
+  else:
+    directory = tempfile.mkdtemp(prefix='routine-concurrency-')
+    os.environ['DB_URL'] = f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}"
+
+  # DB_URL 을 정한 뒤에 앱을 불러와야 엔진이 임시 DB를 가리킨다.
+  import httpx
+  from sqlalchemy import event, func, select
+
+  from app.db import SessionLocal, _engine, init_db
+  from app.main import app, lifespan
+  from app.models.pet_state import PetState
+  from app.models.routine_log import RoutineLog
+  from app.routes.routine import COMPLETE_CONFLICTS, XP_REWARD
+  from app.services.pet_progression import current_curve
+  from app.services.progress_service import rebuild_streaks
+
+  rng = random.Random(args.seed)
+  base = datetime(2025, 1, 6, 7, 0)
+  unique = []
+  for index in range(args.requests):
+    started = base + timedelta(minutes=index)
+    unique.append(
+      {
+        'user_id': 1,
+        'routine_id': 1,
+        'status': rng.choice(['done', 'done', 'partial', 'late']),
+        'started_at': started.isoformat(),
+        'ended_at': (started + timedelta(seconds=30)).isoformat(),
+        'idempotency_key': f'bench-{index}',
+      }
+    )
+  # 재시도 흉내: 일부 요청을 같은 키로 여러 번 보낸다.
+  sends = list(unique)
+  for payload in rng.sample(unique, k=args.requests // 4):
+    sends.extend([payload] * args.retries)
+  rng.shuffle(sends)
+
+  if _engine.dialect.name == 'sqlite':
+    # PostgreSQL처럼 FK를 검사해야 users 행 없이 쓰는 경로가 여기서도 드러난다.
+    @event.listens_for(_engine.sync_engine, 'connect')
+    def _enforce_foreign_keys(dbapi_connection, _connection_record) -> None:
+      dbapi_connection.execute('PRAGMA foreign_keys=ON')
+
+  await init_db()
+  async with lifespan(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+      began = time.perf_counter()
+      responses = await asyncio.gather(*(client.post('/api/routine/complete', json=payload) for payload in sends))
+      elapsed = time.perf_counter() - began
+      new_user_codes = await _new_user_requests(client, unique[0])
+
+    codes: dict[int, int] = {}
+    for response in responses:
+      codes[response.status_code] = codes.get(response.status_code, 0) + 1
+    replayed = sum(1 for response in responses if response.status_code == 200 and response.json()['replayed'])
+
+    async with SessionLocal() as session:
+      logs = (
+        await session.execute(select(func.count()).select_from(RoutineLog).where(RoutineLog.user_id == 1))
+      ).scalar_one()
+      keys = (
+        await session.execute(
+          select(func.count(func.distinct(RoutineLog.idempotency_key))).where(RoutineLog.user_id == 1)
+        )
+      ).scalar_one()
+      pet = await session.get(PetState, 1)
+      actual = (pet.level, pet.xp, pet.next_level_threshold, pet.streak)
+
+    progress = current_curve().progress(sum(XP_REWARD.get(payload['status'], 0) for payload in unique))
+    async with _engine.begin() as conn:
+      await rebuild_streaks(conn)
+    async with SessionLocal() as session:
+      rebuilt = await session.get(PetState, 1)
+      expected = (progress.level, progress.xp, progress.next_level_threshold, rebuilt.streak)
+
+  print(f'sent={len(sends)} unique={len(unique)} elapsed={elapsed:.2f}s ({len(sends) / elapsed:.0f} req/s)')
+  print(f'status codes={codes} replayed={replayed}')
+  print(
+    'conflict retries: '
+    f"version={COMPLETE_CONFLICTS.value(reason='version'):.0f} "
+    f"integrity={COMPLETE_CONFLICTS.value(reason='integrity'):.0f}"
+  )
+  print(f'logs={logs} distinct keys={keys}')
+  print(f'pet (level, xp, threshold, streak) actual={actual} expected={expected}')
+  print(f'new users: {new_user_codes}')
+
+  new_users_ok = all(200 <= code < 300 for codes_ in new_user_codes.values() for code in codes_)
+  ok = codes.get(200) == len(sends) and logs == keys == len(unique) and actual == expected and new_users_ok
+  print('OK' if ok else 'MISMATCH')
+  return 0 if ok else 1
+
+
+async def _new_user_requests(client, completion: dict) -> dict[str, list[int]]:
+  """``users`` 행이 없는 사용자마다 쓰기 경로 하나씩을 보내고 경로별 상태 코드를 돌려준다."""
+
+  routine = {'title': '새 사용자 루틴', 'time': '07:00', 'days': ['월'], 'difficulty': 'easy'}
+  created = await client.post('/api/routine', json={**routine, 'user_id': NEW_USER_ID})
+  # 첫 완료가 동시에 들어와 users/pet_state 행을 함께 만들려는 경우.
+  first = await asyncio.gather(
+    *(
+      client.post(
+        '/api/routine/complete',
+        json={**completion, 'user_id': NEW_USER_ID + 1, 'idempotency_key': f'new-{index % 2}'},
+      )
+      for index in range(6)
+    )
+  )
+  batch = await client.post(
+    '/api/routine/complete/batch',
+    json={'items': [{**completion, 'user_id': NEW_USER_ID + 2}, {**completion, 'user_id': NEW_USER_ID + 3}]},
+  )
+  return {
+    'create': [created.status_code],
+    'complete': [response.status_code for response in first],
+    'batch': [batch.status_code],
+  }
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--requests', type=int, default=400, help='고유 완료 요청 수')
+  parser.add_argument('--retries', type=int, default=3, help='재전송 대상 요청마다 추가로 보낼 횟수')
+  parser.add_argument('--seed', type=int, default=7)
+  parser.add_argument('--db-url', default='', help='비어 있는 DB URL (기본: 임시 SQLite 파일)')
+  sys.exit(asyncio.run(_main(parser.parse_args())))
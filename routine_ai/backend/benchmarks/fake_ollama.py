@@ -0,0 +1,61 @@
+"""벤치마크용 프로세스 내 가짜 Ollama.
+
+``httpx.MockTransport`` 로 ``/api/generate`` 를 흉내 내므로 네트워크 없이 ``OllamaClient`` 전체 경로
+(단일 비행, 대기열, 스트림 파싱)를 그대로 탄다. 본문과 토큰 분할은 HTTP 가짜 서버(``server/main.py``)와 같은
+``server/fake_replies.py`` 를 쓰므로 같은 seed/프롬프트면 두 가짜의 응답이 같다. 장애 주입이나 동시 생성 제한이
+필요하면 서버를 띄우고 ``load_test --ollama-url`` 로 그쪽을 쓴다.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import json
+from pathlib import Path
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parents[2] / 'server'
+
+
+def _load_replies():
+  # server/ 는 패키지가 아니고 별도로 배포되므로 파일 경로로 불러온다.
+  spec = importlib.util.spec_from_file_location('fake_replies', SERVER_DIR / 'fake_replies.py')
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+  return module
+
+
+fake_replies = _load_replies()
+
+
+class FakeOllama:
+  """``latency`` 는 첫 응답까지, ``token_latency`` 는 스트림 토큰 사이 지연(초)이다."""
+
+  def __init__(self, latency: float = 0.02, token_latency: float = 0.0, seed: int = 0) -> None:
+    self.latency = latency
+    self.token_latency = token_latency
+    self.seed = seed
+    self.calls = 0
+
+  def transport(self) -> httpx.MockTransport:
+    return httpx.MockTransport(self._handle)
+
+  async def _handle(self, request: httpx.Request) -> httpx.Response:
+    self.calls += 1
+    body = json.loads(request.content)
+    prompt = body.get('prompt', '')
+    await asyncio.sleep(self.latency)
+    text = fake_replies.reply_for(self.seed, prompt)
+    tokens = fake_replies.tokenize(text)
+    done = {'done': True, 'prompt_eval_count': len(prompt.split()), 'eval_count': len(tokens)}
+    if not body.get('stream'):
+      return httpx.Response(200, json={'response': text, **done})
+    return httpx.Response(200, content=self._stream(tokens, done), headers={'Content-Type': 'application/x-ndjson'})
+
+  async def _stream(self, tokens: list[str], done: dict):
+    for token in tokens:
+      if self.token_latency:
+        await asyncio.sleep(self.token_latency)
+      yield (json.dumps({'response': token, 'done': False}, ensure_ascii=False) + '\n').encode()
+    yield (json.dumps({'response': '', **done}) + '\n').encode()
@@ -0,0 +1,408 @@
+"""백엔드 부하/마이크로 벤치마크.
+
+임시 SQLite DB(또는 ``--db-url`` 로 준 빈 DB)에 사용자/루틴/``routine_logs`` 를 시드한 뒤 앱을 프로세스 안에서 띄워
+``httpx.ASGITransport`` 로 엔드포인트별 요청을 보낸다. Ollama는 ``benchmarks.fake_ollama`` 로 대체하고,
+``--ollama-url`` 을 주면 그 주소(예: 장애 주입을 켠 ``server/main.py`` 가짜 서버)를 앱 설정 그대로의 클라이언트로 호출한다.
+엔드포인트와 서비스 함수(``calculate_streak``, ``_build_stats`` 등)마다 p50/p95/p99 지연과 처리량을 출력하고,
+기준선 JSON과 비교한다.
+
+  cd backend
+  python -m benchmarks.load_test                         # 실행 + benchmarks/baseline.json 과 비교
+  python -m benchmarks.load_test --save-baseline         # 현재 결과를 기준선으로 저장
+  python -m benchmarks.load_test --only stats_weekly,micro.build_stats --requests 500
+  python -m benchmarks.load_test --only coach_chat,recommend --ollama-url http://127.0.0.1:11434
+
+기준선 수치는 기록한 머신에 묶여 있다. 같은 머신/같은 옵션에서의 상대 비교에만 쓴다.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+STATUSES = ('done', 'done', 'done', 'partial', 'late', 'miss')
+ROUTINE_TITLES = ('아침 스트레칭', '물 마시기', '독서 20분', '저녁 산책', '명상')
+GOALS = ('운동', '수면', '독서', '명상', '식단')
+SLOTS = ('morning', 'lunch', 'evening', 'night')
+
+
+@dataclass
+class Request:
+  method: str
+  url: str
+  json: Any = None
+
+
+@dataclass
+class Result:
+  name: str
+  latencies: list[float]
+  elapsed: float
+  errors: int
+
+  def summary(self) -> dict:
+    ordered = sorted(self.latencies)
+    return {
+      'count': len(ordered),
+      'errors': self.errors,
+      'p50_ms': round(_percentile(ordered, 50) * 1000, 3),
+      'p95_ms': round(_percentile(ordered, 95) * 1000, 3),
+      'p99_ms': round(_percentile(ordered, 99) * 1000, 3),
+      'rps': round(len(ordered) / self.elapsed, 1) if self.elapsed else 0.0,
+    }
+
+
+def _percentile(ordered: list[float], pct: float) -> float:
+  if not ordered:
+    return 0.0
+  rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+  return ordered[min(rank, len(ordered) - 1)]
+
+
+async def _seed(args: argparse.Namespace, rng: random.Random) -> None:
+  from sqlalchemy import insert
+
+  from app.db import _engine, init_db
+  from app.dialects import upsert_insert
+  from app.models.pet_state import PetState
+  from app.models.routine import Routine
+  from app.models.routine_log import RoutineLog
+  from app.models.user import User
+  from app.services.pet_progression import current_curve
+  from app.services.progress_service import rebuild_streaks
+  from app.services.rollup_service import _apply_increments, _increments
+  from app.services.schedule import days_to_mask, dump_days, time_to_minutes
+
+  await init_db()
+  curve = current_curve()
+  users = range(1, args.users + 1)
+  routines = []
+  for user_id in users:
+    for index in range(args.routines):
+      days = rng.sample(['월', '화', '수', '목', '금', '토', '일'], k=rng.randint(1, 7))
+      clock = f'{rng.randint(5, 22):02d}:{rng.choice([0, 15, 30, 45]):02d}'
+      routines.append(
+        {
+          'user_id': user_id,
+          'title': ROUTINE_TITLES[index % len(ROUTINE_TITLES)],
+          'time': clock,
+          'days': dump_days(days),
+          'days_mask': days_to_mask(days),
+          'time_minutes': time_to_minutes(clock),
+        }
+      )
+
+  now = datetime.now().replace(second=0, microsecond=0)
+  logs = []
+  xp = dict.fromkeys(users, 0)
+  for _ in range(args.logs):
+    user_id = rng.choice(users)
+    started = now - timedelta(minutes=rng.randint(0, args.days * 24 * 60))
+    ended = started + timedelta(minutes=rng.randint(5, 60))
+    status = rng.choice(STATUSES)
+    xp[user_id] += {'done': 10, 'partial': 5, 'late': 6}.get(status, 0)
+    logs.append(
+      {
+        'user_id': user_id,
+        'routine_id': rng.randint(1, args.routines),
+        'status': status,
+        'started_at': started.isoformat(),
+        'ended_at': ended.isoformat(),
+        'started_ts': started,
+        'ended_ts': ended,
+      }
+    )
+  logs.sort(key=lambda row: row['ended_ts'])
+
+  pets = []
+  for user_id, total in xp.items():
+    progress = curve.progress(total)
+    pets.append(
+      {
+        'user_id': user_id,
+        'total_xp': total,
+        'level': progress.level,
+        'xp': progress.xp,
+        'next_level_threshold': progress.next_level_threshold,
+      }
+    )
+
+  async with _engine.begin() as conn:
+    await conn.execute(
+      upsert_insert(conn, User).on_conflict_do_nothing(index_elements=['id']),
+      [{'id': user_id} for user_id in users],
+    )
+    pet_insert = upsert_insert(conn, PetState)
+    await conn.execute(
+      pet_insert.on_conflict_do_update(
+        index_elements=['user_id'],
+        set_={column: pet_insert.excluded[column] for column in ('total_xp', 'level', 'xp', 'next_level_threshold')},
+      ),
+      pets,
+    )
+    await conn.execute(insert(Routine), routines)
+    for start in range(0, len(logs), 5000):
+      await conn.execute(insert(RoutineLog), logs[start:start + 5000])
+    # init_db 가 백필 워터마크를 이미 정했으므로 시드 로그는 백필 대상이 아니다. 완료 경로처럼 집계에 직접 더하고
+    # streak 도 다시 계산해야 통계 벤치마크가 빈 테이블이 아닌 실제 데이터를 읽는다.
+    await _apply_increments(conn, _increments((row['user_id'], row['status'], row['started_ts']) for row in logs))
+    await rebuild_streaks(conn)
+
+
+def _scenarios(args: argparse.Namespace, rng: random.Random) -> dict[str, Callable[[int], Request]]:
+  today = date.today()
+
+  def user() -> int:
+    return rng.randint(1, args.users)
+
+  def complete(index: int) -> Request:
+    started = datetime.now() - timedelta(minutes=rng.randint(0, 600))
+    return Request(
+      'POST',
+      '/api/routine/complete',
+      {
+        'user_id': user(),
+        'routine_id': rng.randint(1, args.routines),
+        'status': rng.choice(STATUSES),
+        'started_at': started.isoformat(timespec='seconds'),
+        'ended_at': (started + timedelta(minutes=20)).isoformat(timespec='seconds'),
+        'idempotency_key': f'bench-{index}-{rng.random()}',
+      },
+    )
+
+  return {
+    'pet_state': lambda _: Request('GET', f'/api/pet/state?user_id={user()}'),
+    'routine_list': lambda _: Request('GET', f'/api/routine?user_id={user()}'),
+    'routine_complete': complete,
+    'stats_weekly': lambda _: Request('GET', f'/api/stats/weekly?user_id={user()}'),
+    'stats_range': lambda _: Request(
+      'GET',
+      f'/api/stats/range?user_id={user()}&from={today - timedelta(days=args.days)}&to={today}&granularity=week',
+    ),
+    'admin_logs': lambda _: Request('GET', f'/admin/logs?user_id={user()}&limit=100'),
+    'coach_chat': lambda _: Request(
+      'POST', '/api/coach/chat', {'user_id': user(), 'message': f'오늘 {rng.choice(GOALS)} 루틴 어떻게 할까?'}
+    ),
+    'recommend': lambda _: Request(
+      'POST',
+      '/api/recommend/generate',
+      {'user_id': user(), 'goals': rng.sample(GOALS, k=2), 'prefer_slots': [rng.choice(SLOTS)], 'calendar': []},
+    ),
+  }
+
+
+async def _run_endpoint(client, name: str, build: Callable[[int], Request], args: argparse.Namespace) -> Result:
+  latencies: list[float] = []
+  errors = 0
+  counter = iter(range(args.requests))
+
+  async def worker() -> None:
+    nonlocal errors
+    for index in counter:
+      request = build(index)
+      began = time.perf_counter()
+      response = await client.request(request.method, request.url, json=request.json)
+      latencies.append(time.perf_counter() - began)
+      if response.status_code >= 400:
+        errors += 1
+
+  began = time.perf_counter()
+  await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+  return Result(name, latencies, time.perf_counter() - began, errors)
+
+
+async def _run_micro(name: str, call: Callable[[], Awaitable[Any]], iterations: int) -> Result:
+  latencies: list[float] = []
+  began = time.perf_counter()
+  for _ in range(iterations):
+    started = time.perf_counter()
+    await call()
+    latencies.append(time.perf_counter() - started)
+  return Result(name, latencies, time.perf_counter() - began, 0)
+
+
+def _micro_benchmarks(args: argparse.Namespace, rng: random.Random) -> dict[str, Callable[[], Awaitable[Any]]]:
+  from app.db import SessionLocal
+  from app.routes import stats
+  from app.services.progress_service import calculate_streak, streak_history
+  from app.services.stats_service import week_start_of
+
+  week_start = week_start_of(date.today())
+
+  async def build_stats() -> None:
+    async with SessionLocal() as session:
+      await stats._build_stats(session, rng.randint(1, args.users), week_start)
+      await session.commit()
+
+  async def streak() -> None:
+    async with SessionLocal() as session:
+      await calculate_streak(session, rng.randint(1, args.users))
+
+  async def history() -> None:
+    start = datetime.combine(date.today() - timedelta(days=args.days), datetime.min.time())
+    checkpoints = [start + timedelta(days=7 * index) for index in range(args.days // 7 + 1)]
+    async with SessionLocal() as session:
+      await streak_history(session, rng.randint(1, args.users), checkpoints)
+
+  return {'micro.build_stats': build_stats, 'micro.calculate_streak': streak, 'micro.streak_history': history}
+
+
+async def _main(args: argparse.Namespace) -> int:
+  if args.db_url:
+    os.environ['DB_URL'] = args.db_url
+  else:
+    directory = tempfile.mkdtemp(prefix='routine-load-')
+    os.environ['DB_URL'] = f"sqlite+aiosqlite:///{os.path.join(directory, 'bench.db')}"
+  if args.ollama_url:
+    os.environ['OLLAMA_URL'] = args.ollama_url
+
+  # DB_URL 을 정한 뒤에 앱을 불러와야 엔진이 임시 DB를 가리킨다.
+  import httpx
+
+  from app.db import SessionLocal
+  from app.deps import get_ollama_client
+  from app.main import app, lifespan
+  from app.metrics import render_text
+  from app.services.ollama_client import OllamaClient
+  from app.services.rollup_service import rollups_ready
+
+  from .fake_ollama import FakeOllama
+
+  rng = random.Random(args.seed)
+  seeded = time.perf_counter()
+  await _seed(args, rng)
+  print(f'seeded users={args.users} routines={args.users * args.routines} logs={args.logs} '
+        f'in {time.perf_counter() - seeded:.1f}s')
+
+  if args.ollama_url:
+    # 앱 설정(OLLAMA_TIMEOUT_SECONDS, OLLAMA_MAX_IN_FLIGHT 등)을 그대로 쓰는 클라이언트로 실제 HTTP 호출을 한다.
+    ollama = get_ollama_client()
+  else:
+    fake = FakeOllama(latency=args.ollama_latency)
+    ollama = OllamaClient('http://fake-ollama', 'bench-model', transport=fake.transport())
+    app.dependency_overrides[get_ollama_client] = lambda: ollama
+  selected = set(args.only.split(',')) if args.only else None
+
+  results: list[Result] = []
+  async with lifespan(app):
+    # 백그라운드 집계 백필이 끝나야 통계가 운영과 같은 경로(일별 집계)를 탄다.
+    while True:
+      async with SessionLocal() as session:
+        if await rollups_ready(session):
+          break
+      await asyncio.sleep(0.05)
+
+    _print_header()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+      for name, build in _scenarios(args, rng).items():
+        if selected is None or name in selected:
+          results.append(await _run_endpoint(client, name, build, args))
+          _print_row(results[-1])
+    for name, call in _micro_benchmarks(args, rng).items():
+      if selected is None or name in selected:
+        results.append(await _run_micro(name, call, args.micro_iterations))
+        _print_row(results[-1])
+    await ollama.aclose()
+  if args.ollama_url:
+    _print_ollama_failures(render_text())
+
+  report = {
+    'config': {key: getattr(args, key) for key in CONFIG_KEYS},
+    'results': {result.name: result.summary() for result in results},
+  }
+  if args.output:
+    Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+  if args.save_baseline:
+    BASELINE_PATH.write_text(json.dumps(report, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    print(f'baseline saved to {BASELINE_PATH}')
+    return 0
+  return _compare(report, args.tolerance)
+
+
+CONFIG_KEYS = (
+  'users',
+  'routines',
+  'logs',
+  'days',
+  'requests',
+  'concurrency',
+  'micro_iterations',
+  'ollama_latency',
+  'ollama_url',
+)
+FAILURE_METRICS = ('ollama_failures_total{', 'admission_rejected_total{', 'coach_stream_fallbacks_total')
+
+
+def _print_header() -> None:
+  print(f"{'name':<24} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9}")
+
+
+def _print_row(result: Result) -> None:
+  summary = result.summary()
+  print(
+    f"{result.name:<24} {summary['count']:>6} {summary['errors']:>4} {summary['p50_ms']:>9.2f} "
+    f"{summary['p95_ms']:>9.2f} {summary['p99_ms']:>9.2f} {summary['rps']:>9.1f}"
+  )
+
+
+def _print_ollama_failures(metrics: str) -> None:
+  """실제 HTTP로 호출한 경우 타임아웃/대체 응답 경로를 얼마나 탔는지 보여 준다."""
+
+  lines = [line for line in metrics.splitlines() if line.startswith(FAILURE_METRICS)]
+  print('\nollama failures:' if lines else '\nollama failures: none')
+  for line in lines:
+    print(f'  {line}')
+
+
+def _compare(report: dict, tolerance: float) -> int:
+  """기준선 대비 p95가 ``tolerance`` 비율 이상 느려진 항목이 있으면 1을 돌려준다."""
+
+  if not BASELINE_PATH.exists():
+    print('no baseline; run with --save-baseline to create one')
+    return 0
+  baseline = json.loads(BASELINE_PATH.read_text(encoding='utf-8'))
+  if baseline.get('config') != report['config']:
+    print('baseline was recorded with different options; comparison may be meaningless')
+  regressions = 0
+  print(f"\n{'name':<24} {'base p95':>9} {'p95':>9} {'delta':>8}")
+  for name, current in report['results'].items():
+    previous = baseline.get('results', {}).get(name)
+    if previous is None or not previous['p95_ms']:
+      continue
+    delta = current['p95_ms'] / previous['p95_ms'] - 1
+    flag = '  REGRESSION' if delta > tolerance else ''
+    regressions += bool(flag)
+    print(f"{name:<24} {previous['p95_ms']:>9.2f} {current['p95_ms']:>9.2f} {delta:>+8.0%}{flag}")
+  return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--users', type=int, default=200)
+  parser.add_argument('--routines', type=int, default=5, help='사용자당 루틴 수')
+  parser.add_argument('--logs', type=int, default=50000, help='시드할 routine_logs 행 수')
+  parser.add_argument('--days', type=int, default=90, help='로그를 흩뿌릴 과거 일수')
+  parser.add_argument('--requests', type=int, default=1000, help='엔드포인트별 요청 수')
+  parser.add_argument('--concurrency', type=int, default=16)
+  parser.add_argument('--micro-iterations', type=int, default=200)
+  parser.add_argument('--ollama-latency', type=float, default=0.02, help='가짜 Ollama 응답 지연(초)')
+  parser.add_argument('--ollama-url', default='', help='프로세스 내 가짜 대신 호출할 Ollama(또는 server/ 가짜 서버) 주소')
+  parser.add_argument('--only', default='', help='쉼표로 구분한 실행 대상 이름')
+  parser.add_argument('--seed', type=int, default=42)
+  parser.add_argument('--db-url', default='', help='비어 있는 DB URL (기본: 임시 SQLite 파일)')
+  parser.add_argument('--tolerance', type=float, default=0.25, help='기준선 대비 허용 p95 증가 비율')
+  parser.add_argument('--output', default='', help='결과 JSON 저장 경로')
+  parser.add_argument('--save-baseline', action='store_true')
+  sys.exit(asyncio.run(_main(parser.parse_args())))
@@ -0,0 +1,134 @@
+"""SQLite PRAGMA 프로필별 읽기/쓰기 동시성 벤치마크.
+
+기본 설정(rollback journal, synchronous=FULL)과 ``app.db.sqlite_pragmas()`` 의 튜닝 프로필을
+같은 부하로 비교한다. 쓰기 작업자는 ``routine_logs`` 에 한 건씩 넣고 커밋하며, 읽기 작업자는
+주간 통계와 같은 인덱스 범위 조회를 반복한다.
+
+  cd backend
+  python -m benchmarks.sqlite_pragmas --seconds 5 --writers 4 --readers 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.db import install_sqlite_pragmas, sqlite_pragmas
+from app.models.base import Base
+from app.models.routine_log import RoutineLog
+from app.models.user import User
+
+SEED_ROWS = 20000
+
+
+async def _run_profile(name: str, pragmas: list[tuple[str, object]], args: argparse.Namespace) -> dict:
+  directory = tempfile.mkdtemp(prefix='routine-bench-')
+  path = os.path.join(directory, 'bench.db')
+  engine = create_async_engine(
+    f'sqlite+aiosqlite:///{path}',
+    connect_args={'timeout': args.busy_timeout},
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=args.writers + args.readers,
+  )
+  install_sqlite_pragmas(engine, pragmas)
+
+  base = datetime(2025, 1, 6, 7, 0)
+  async with engine.begin() as conn:
+    await conn.run_sync(Base.metadata.create_all)
+    await conn.execute(insert(User), [{'id': user_id} for user_id in range(1, args.users + 1)])
+    await conn.execute(insert(RoutineLog), [_log_row(index, args.users, base) for index in range(SEED_ROWS)])
+
+  deadline = time.perf_counter() + args.seconds
+  counts = {'writes': 0, 'reads': 0, 'locked': 0}
+  read_latency: list[float] = []
+
+  async def writer(worker: int) -> None:
+    index = SEED_ROWS + worker
+    while time.perf_counter() < deadline:
+      try:
+        async with engine.begin() as conn:
+          await conn.execute(insert(RoutineLog), [_log_row(index, args.users, base)])
+        counts['writes'] += 1
+      except OperationalError:
+        counts['locked'] += 1
+      index += args.writers
+
+  async def reader(worker: int) -> None:
+    user_id = worker % args.users + 1
+    start = base
+    while time.perf_counter() < deadline:
+      began = time.perf_counter()
+      try:
+        async with engine.connect() as conn:
+          await conn.execute(
+            select(func.count())
+            .select_from(RoutineLog)
+            .where(
+              RoutineLog.user_id == user_id,
+              RoutineLog.started_ts >= start,
+              RoutineLog.started_ts < start + timedelta(days=7),
+            )
+          )
+        counts['reads'] += 1
+        read_latency.append(time.perf_counter() - began)
+      except OperationalError:
+        counts['locked'] += 1
+
+  await asyncio.gather(
+    *(writer(worker) for worker in range(args.writers)),
+    *(reader(worker) for worker in range(args.readers)),
+  )
+  await engine.dispose()
+
+  read_latency.sort()
+  p95 = read_latency[int(len(read_latency) * 0.95)] if read_latency else 0.0
+  return {
+    'profile': name,
+    'writes_per_s': counts['writes'] / args.seconds,
+    'reads_per_s': counts['reads'] / args.seconds,
+    'read_p95_ms': p95 * 1000,
+    'locked_errors': counts['locked'],
+  }
+
+
+def _log_row(index: int, users: int, base: datetime) -> dict:
+  started = base + timedelta(minutes=37 * index)
+  return {
+    'user_id': index % users + 1,
+    'routine_id': 1,
+    'status': 'done' if index % 3 else 'late',
+    'started_at': started.isoformat(),
+    'ended_at': (started + timedelta(minutes=30)).isoformat(),
+    'started_ts': started,
+    'ended_ts': started + timedelta(minutes=30),
+  }
+
+
+async def _main(args: argparse.Namespace) -> None:
+  profiles = [('default', []), ('tuned', sqlite_pragmas())]
+  print(f"{'profile':<8} {'writes/s':>10} {'reads/s':>10} {'read p95 ms':>12} {'locked':>7}")
+  for name, pragmas in profiles:
+    result = await _run_profile(name, pragmas, args)
+    print(
+      f"{result['profile']:<8} {result['writes_per_s']:>10.1f} {result['reads_per_s']:>10.1f} "
+      f"{result['read_p95_ms']:>12.2f} {result['locked_errors']:>7}"
+    )
+
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument('--seconds', type=float, default=5.0)
+  parser.add_argument('--writers', type=int, default=4)
+  parser.add_argument('--readers', type=int, default=16)
+  parser.add_argument('--users', type=int, default=50)
+  parser.add_argument('--busy-timeout', type=float, default=1.0, help='sqlite3 connect timeout (초)')
+  asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,64 @@
+"""가짜 Ollama 응답 본문.
+
+`main.py`(HTTP 서버)와 백엔드 벤치마크의 프로세스 내 가짜(`backend/benchmarks/fake_ollama.py`)가 같은
+본문을 쓰도록 여기에 모읍니다. 표준 라이브러리만 쓰고 임포트 시 부작용이 없어야 합니다.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from typing import Any, Dict, List
+
+PLANS: List[Dict[str, Any]] = [
+    {
+        "title": "아침 스트레칭",
+        "days": ["월", "수", "금"],
+        "time": "07:00",
+        "duration_min": 10,
+        "difficulty": "easy",
+        "reason": "기상 직후 몸을 깨우기 좋아요.",
+    },
+    {
+        "title": "점심 산책",
+        "days": ["화", "목"],
+        "time": "12:30",
+        "duration_min": 20,
+        "difficulty": "mid",
+        "reason": "식후 가벼운 걷기는 오후 집중력에 도움이 돼요.",
+    },
+    {
+        "title": "저녁 근력 운동",
+        "days": ["월", "목", "토"],
+        "time": "19:00",
+        "duration_min": 30,
+        "difficulty": "hard",
+        "reason": "퇴근 후 일정한 시간에 하면 습관으로 굳히기 쉬워요.",
+    },
+]
+
+REPLY_SENTENCES: List[str] = [
+    "오늘도 루틴을 챙기려는 마음이 멋져요.",
+    "작은 단계부터 시작하면 부담이 줄어들어요.",
+    "어제보다 한 걸음만 더 나아가 봐요.",
+    "쉬는 것도 루틴의 일부라는 걸 잊지 마세요.",
+    "지금 리듬을 그대로 이어가면 충분해요.",
+    "물 한 잔 마시고 가볍게 몸을 풀어볼까요?",
+]
+
+
+def reply_for(seed: int, prompt: str) -> str:
+    """같은 seed, 같은 프롬프트면 같은 본문. 추천 프롬프트(`JSON` 포함)에는 계획 JSON을 돌려줍니다."""
+
+    rng = random.Random(f"{seed}:{prompt}")
+    if "JSON" in prompt:
+        count = rng.randint(2, len(PLANS))
+        return json.dumps({"plans": PLANS[:count]}, ensure_ascii=False)
+    return " ".join(rng.sample(REPLY_SENTENCES, k=3))
+
+
+def tokenize(text: str) -> List[str]:
+    """공백 단위로 자르고 구분자를 앞 조각에 붙여 그대로 이으면 원문이 되게 한다."""
+
+    words = text.split(" ")
+    return [word + " " for word in words[:-1]] + [words[-1]]
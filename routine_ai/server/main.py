@@ -1,212 +1,232 @@
+"""Ollama 대역(fake) 서버.
+
+실제 Ollama 없이 백엔드의 타임아웃/대체 응답/동시성 동작을 재현하기 위한 로컬 서버입니다.
+Ollama HTTP API 중 백엔드가 쓰는 `/api/generate`(스트리밍/비스트리밍)와 상태 확인용 `/api/tags`,
+`/api/version`을 흉내 냅니다.
+
+    cd server
+    uvicorn main:app --port 11434
+
+- 지연: 첫 토큰까지(`FAKE_OLLAMA_FIRST_TOKEN_MS`), 토큰 간(`FAKE_OLLAMA_TOKEN_MS`), 무작위 흔들림(`FAKE_OLLAMA_JITTER_MS`)
+- 동시 처리: `FAKE_OLLAMA_NUM_PARALLEL` 개까지만 동시에 생성하고 나머지는 대기 (Ollama의 `OLLAMA_NUM_PARALLEL`과 같은 의미)
+- 장애 주입: 500 응답(`FAKE_OLLAMA_FAILURE_RATE`), 응답 없이 멈춤(`FAKE_OLLAMA_HANG_RATE`),
+  스트림 중간 오류(`FAKE_OLLAMA_STREAM_ERROR_RATE`)
+- 결정성: 같은 `FAKE_OLLAMA_SEED`, 같은 프롬프트면 같은 본문을 돌려줍니다. 장애 여부는 요청 순서에 따라 결정됩니다.
+- 추천 프롬프트(`JSON` 포함)에는 `{"plans": [...]}` 형식의 정해진 계획을 돌려줍니다. 본문은 `fake_replies.py`에 있고
+  백엔드 벤치마크의 프로세스 내 가짜(`backend/benchmarks/fake_ollama.py`)도 같은 본문을 씁니다.
+
+실행 중에는 `GET/PUT /_fake/config`로 설정을 바꾸고 `GET /_fake/stats`로 호출 수를 볼 수 있습니다.
+"""
+
 from __future__ import annotations
 
+import asyncio
 import json
 import os
-import re
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
-import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
+from fake_replies import reply_for, tokenize
+
 # Load environment variables from .env located next to this file.
 load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
 
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
-MODEL_NAME = os.getenv("MODEL", "mistral:7b-instruct")
-
-app = FastAPI(title="Routine AI Backend", version="0.1.0")
-
-# Allow Chrome/Flutter web running on localhost variants.
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-class CoachChatRequest(BaseModel):
-    user_id: int = Field(..., ge=1)
-    message: str
-    context_flags: Optional[Dict[str, bool]] = None
-
-
-class CoachChatResponse(BaseModel):
-    reply: str
-
-
-class RecommendRequest(BaseModel):
-    user_id: int = Field(..., ge=1)
-    goals: List[str] = Field(default_factory=list)
-    prefer_slots: List[str] = Field(default_factory=list)
-    calendar: List[Any] = Field(default_factory=list)
-
-
-class RoutinePlan(BaseModel):
-    title: str
-    days: List[str]
-    time: str
-    duration_min: int
-    difficulty: str
-    reason: str
 
-
-class RecommendResponse(BaseModel):
-    plans: List[RoutinePlan]
-
-
-class RoutineCompleteRequest(BaseModel):
-    user_id: int = Field(..., ge=1)
-    routine_id: int = Field(..., ge=1)
-    status: str
-    started_at: str
-    ended_at: str
-    note: Optional[str] = None
-    sleep_hours: Optional[float] = None
-
-
-class RoutineCompleteResponse(BaseModel):
-    pet_state: Dict[str, int]
-    streak: int
-    coach_hint: Optional[str] = None
+class FakeConfig(BaseModel):
+    model: str = Field(default="mistral:7b-instruct")
+    first_token_ms: float = Field(default=300.0, ge=0)
+    token_ms: float = Field(default=30.0, ge=0)
+    jitter_ms: float = Field(default=0.0, ge=0)
+    num_parallel: int = Field(default=1, ge=1)
+    failure_rate: float = Field(default=0.0, ge=0, le=1)
+    hang_rate: float = Field(default=0.0, ge=0, le=1)
+    hang_seconds: float = Field(default=600.0, ge=0)
+    stream_error_rate: float = Field(default=0.0, ge=0, le=1)
+    seed: int = 0
+
+
+class ConfigPatch(BaseModel):
+    model: Optional[str] = None
+    first_token_ms: Optional[float] = Field(default=None, ge=0)
+    token_ms: Optional[float] = Field(default=None, ge=0)
+    jitter_ms: Optional[float] = Field(default=None, ge=0)
+    num_parallel: Optional[int] = Field(default=None, ge=1)
+    failure_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    hang_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    hang_seconds: Optional[float] = Field(default=None, ge=0)
+    stream_error_rate: Optional[float] = Field(default=None, ge=0, le=1)
+    seed: Optional[int] = None
+
+
+class GenerateRequest(BaseModel):
+    model: Optional[str] = None
+    prompt: str = ""
+    stream: bool = True
+
+
+def load_config() -> FakeConfig:
+    values: Dict[str, str] = {}
+    for name in FakeConfig.model_fields:
+        raw = os.getenv(f"FAKE_OLLAMA_{name.upper()}")
+        if raw not in (None, ""):
+            values[name] = raw
+    return FakeConfig.model_validate(values)
+
+
+class FakeOllama:
+    def __init__(self, config: FakeConfig) -> None:
+        self.configure(config)
+        self.stats: Dict[str, int] = {
+            "requests": 0,
+            "streams": 0,
+            "failures": 0,
+            "hangs": 0,
+            "stream_errors": 0,
+            "in_flight": 0,
+            "waiting": 0,
+        }
+
+    def configure(self, config: FakeConfig) -> None:
+        self.config = config
+        self.semaphore = asyncio.Semaphore(config.num_parallel)
+        # 장애 주입 여부는 요청 순서에 따른 난수열로 정한다. 본문은 프롬프트로 정해져 순서와 무관하다.
+        self.fault_rng = random.Random(config.seed)
+        self.jitter_rng = random.Random(config.seed + 1)
+
+    def reply_for(self, prompt: str) -> str:
+        return reply_for(self.config.seed, prompt)
+
+    def draw_fault(self, stream: bool) -> Optional[str]:
+        roll = self.fault_rng.random()
+        if roll < self.config.failure_rate:
+            return "failure"
+        roll -= self.config.failure_rate
+        if roll < self.config.hang_rate:
+            return "hang"
+        roll -= self.config.hang_rate
+        if stream and roll < self.config.stream_error_rate:
+            return "stream_error"
+        return None
+
+    async def pause(self, milliseconds: float) -> None:
+        jitter = self.jitter_rng.uniform(0, self.config.jitter_ms) if self.config.jitter_ms else 0.0
+        delay = (milliseconds + jitter) / 1000
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+fake = FakeOllama(load_config())
+app = FastAPI(title="Fake Ollama", version="0.1.0")
+
+
+def chunk(model: str, **fields: Any) -> Dict[str, Any]:
+    return {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), **fields}
+
+
+def final_fields(prompt: str, tokens: int, started: float) -> Dict[str, Any]:
+    elapsed_ns = int((time.perf_counter() - started) * 1e9)
+    return {
+        "done": True,
+        "done_reason": "stop",
+        "total_duration": elapsed_ns,
+        "prompt_eval_count": len(prompt.split()),
+        "eval_count": tokens,
+        "eval_duration": elapsed_ns,
+    }
 
 
-@app.on_event("startup")
-async def startup_event() -> None:
-    app.state.http_client = httpx.AsyncClient(
-        base_url=OLLAMA_URL,
-        timeout=httpx.Timeout(60.0, read=60.0, connect=10.0),
+@app.get("/api/version")
+async def version() -> Dict[str, str]:
+    return {"version": "0.0.0-fake"}
+
+
+@app.get("/api/tags")
+async def tags() -> Dict[str, Any]:
+    return {"models": [{"name": fake.config.model, "model": fake.config.model, "size": 0}]}
+
+
+@app.post("/api/generate")
+async def generate(request: GenerateRequest):
+    fake.stats["requests"] += 1
+    model = request.model or fake.config.model
+    fault = fake.draw_fault(request.stream)
+    if fault == "failure":
+        fake.stats["failures"] += 1
+        return JSONResponse(status_code=500, content={"error": "fake ollama: injected failure"})
+    if fault == "hang":
+        fake.stats["hangs"] += 1
+        await asyncio.sleep(fake.config.hang_seconds)
+        return JSONResponse(status_code=504, content={"error": "fake ollama: injected hang"})
+
+    text = fake.reply_for(request.prompt)
+    tokens = tokenize(text)
+    if not request.stream:
+        started = time.perf_counter()
+        async with generation_slot():
+            await fake.pause(fake.config.first_token_ms + fake.config.token_ms * (len(tokens) - 1))
+        return chunk(model, response=text, **final_fields(request.prompt, len(tokens), started))
+
+    fake.stats["streams"] += 1
+    return StreamingResponse(
+        stream_tokens(model, request.prompt, tokens, fault == "stream_error"),
+        media_type="application/x-ndjson",
     )
 
 
-@app.on_event("shutdown")
-async def shutdown_event() -> None:
-    client: httpx.AsyncClient = app.state.http_client
-    await client.aclose()
+async def stream_tokens(model: str, prompt: str, tokens: List[str], break_midway: bool) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    async with generation_slot():
+        for index, token in enumerate(tokens):
+            await fake.pause(fake.config.first_token_ms if index == 0 else fake.config.token_ms)
+            if break_midway and index == len(tokens) // 2:
+                fake.stats["stream_errors"] += 1
+                yield json.dumps({"error": "fake ollama: injected stream error"}) + "\n"
+                return
+            yield json.dumps(chunk(model, response=token, done=False), ensure_ascii=False) + "\n"
+        yield json.dumps(chunk(model, response="", **final_fields(prompt, len(tokens), started))) + "\n"
 
 
-async def call_ollama(prompt: str) -> str:
-    client: httpx.AsyncClient = app.state.http_client
-    try:
-        response = await client.post(
-            "/api/generate",
-            json={"model": MODEL_NAME, "prompt": prompt, "stream": False},
-        )
-        response.raise_for_status()
-    except httpx.HTTPError as error:
-        raise HTTPException(status_code=502, detail=f"Ollama 요청 실패: {error}") from error
-
-    data = response.json()
-    text = data.get("response")
-    if not text:
-        raise HTTPException(status_code=502, detail="Ollama 응답에 reply가 없습니다.")
-    return text.strip()
-
-
-def extract_json_block(text: str) -> Dict[str, Any]:
-    cleaned = text.strip()
-    if cleaned.startswith("```"):
-        lines = [line for line in cleaned.splitlines() if not line.strip().startswith("```")]
-        cleaned = "\n".join(lines).strip()
-
-    match = re.search(r"\{.*\}", cleaned, re.DOTALL)
-    if match:
-        cleaned = match.group(0)
+@asynccontextmanager
+async def generation_slot() -> AsyncIterator[None]:
+    """`num_parallel` 개까지만 동시에 생성하고 나머지는 줄을 세운다."""
 
+    semaphore = fake.semaphore
+    fake.stats["waiting"] += 1
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError as error:
-        raise HTTPException(status_code=502, detail=f"LLM JSON 파싱 실패: {error}") from error
+        await semaphore.acquire()
+    finally:
+        fake.stats["waiting"] -= 1
+    fake.stats["in_flight"] += 1
+    try:
+        yield
+    finally:
+        fake.stats["in_flight"] -= 1
+        semaphore.release()
 
 
-@app.post("/api/coach/chat", response_model=CoachChatResponse)
-async def coach_chat(request: CoachChatRequest) -> CoachChatResponse:
-    prompt = (
-        "당신은 친절한 한국어 루틴 코치입니다. 사용자의 고민을 듣고 간단한 조언을 3문장 이내로 답변하세요.\n"
-        f"사용자 메시지: {request.message}\n"
-    )
-    reply = await call_ollama(prompt)
-    return CoachChatResponse(reply=reply)
-
-
-@app.post("/api/recommend/generate", response_model=RecommendResponse)
-async def recommend_generate(request: RecommendRequest) -> RecommendResponse:
-    goal_text = ", ".join(request.goals) if request.goals else "미설정"
-    slot_text = ", ".join(request.prefer_slots) if request.prefer_slots else "미설정"
-    prompt = (
-        "당신은 루틴 전문가입니다. 아래 정보를 참고해 루틴 2~3개를 추천하고 JSON으로만 답변하세요.\n"
-        f"목표: {goal_text}\n"
-        f"선호 시간대: {slot_text}\n"
-        "각 루틴은 title, days(요일 배열: 월~일 중 문자열), time(24시간 HH:MM), duration_min(정수), "
-        "difficulty(easy/mid/hard), reason(간단한 한글 설명)을 포함해야 합니다.\n"
-        '반드시 {"plans": [...]} 형식의 순수 JSON만 출력하세요. 설명 문장은 쓰지 마세요.'
-    )
-    response_text = await call_ollama(prompt)
-    data = extract_json_block(response_text)
-
-    plans_raw = data.get("plans")
-    if not isinstance(plans_raw, list):
-        raise HTTPException(status_code=502, detail="LLM이 plans 배열을 반환하지 않았습니다.")
-
-    plans: List[RoutinePlan] = []
-    for entry in plans_raw:
-        if not isinstance(entry, dict):
-            continue
-        if not {"title", "days", "time", "duration_min", "difficulty", "reason"}.issubset(entry.keys()):
-            continue
-        plans.append(
-            RoutinePlan(
-                title=str(entry["title"]),
-                days=[str(day) for day in entry.get("days", [])],
-                time=str(entry["time"]),
-                duration_min=int(entry["duration_min"]),
-                difficulty=str(entry["difficulty"]),
-                reason=str(entry["reason"]),
-            )
-        )
-
-    if not plans:
-        raise HTTPException(status_code=502, detail="LLM 추천 데이터를 읽어오지 못했습니다.")
-
-    return RecommendResponse(plans=plans)
-
-
-@app.get("/api/pet/state")
-async def pet_state() -> Dict[str, int]:
-    return {"level": 3, "xp": 45, "next_level_threshold": 100}
-
-
-@app.get("/api/stats/weekly")
-async def stats_weekly() -> Dict[str, Any]:
-    return {
-        "completion_rate": 0.7,
-        "streak": 4,
-        "best_slots": ["아침", "저녁"],
-        "insights": ["아침 루틴 성공률이 높아요"],
-        "tips": ["너무 무리하지 마세요."],
-    }
+@app.get("/_fake/config", response_model=FakeConfig)
+async def get_config() -> FakeConfig:
+    return fake.config
 
 
-@app.post("/api/routine/complete", response_model=RoutineCompleteResponse)
-async def routine_complete(request: RoutineCompleteRequest) -> RoutineCompleteResponse:
-    return RoutineCompleteResponse(
-        pet_state={"level": 3, "xp": 50, "next_level_threshold": 100},
-        streak=5,
-        coach_hint="오늘도 꾸준히 이어가볼까요?",
-    )
+@app.put("/_fake/config", response_model=FakeConfig)
+async def update_config(patch: ConfigPatch) -> FakeConfig:
+    """바뀐 항목만 덮어씁니다. 동시성 제한과 장애 난수열은 새 설정으로 다시 만들어집니다."""
 
+    updated = fake.config.model_copy(update=patch.model_dump(exclude_none=True))
+    fake.configure(updated)
+    return fake.config
 
 
-@app.get("/api/routine/recommend")
-async def recommend_routine():
-    return {
-        "title": "아침 스트레칭",
-        "icon": "yoga",
-        "time": "07:00",
-        "days": ["월", "수", "금"],
-    }
+@app.get("/_fake/stats")
+async def get_stats() -> Dict[str, int]:
+    return dict(fake.stats)